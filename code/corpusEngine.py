@@ -0,0 +1,689 @@
+import os
+import re
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from sentenceSegmentation import segment_text, split_sentences, sentence_length_stats, sentence_length_histogram, \
+    word_tokenize_sentence_lengths
+from regexTokenizer import regex_word_tokenize
+from metricStore import Ratio
+from syllableTable import syllable_table
+from yearAggregates import YearAggregates
+from corpusReader import corpus_glob, read_corpus_text, ReadAhead
+
+
+def preprocess_text(text):
+    """Remove paragraph and page numbers formatted as 'number.' from the text."""
+    pattern = r'^\d+\.\s+'
+    lines = text.split('\n')
+    processed_lines = []
+    for line in lines:
+        if re.match(pattern, line):
+            line = re.sub(pattern, '', line, count=1)
+        processed_lines.append(line)
+    return '\n'.join(processed_lines)
+
+
+def iter_session_files(folder_path, skip_years=(1948, 1949)):
+    """Yield (session, year, txt_file) for every speech in the session folders, in session order."""
+    session_folders = sorted(corpus_glob(os.path.join(folder_path, "Session*")))
+
+    for session_folder in session_folders:
+        # Extract session number and year from folder name
+        match = re.search(r'Session\s(\d{2})\s-\s(\d{4})$', session_folder)
+        if not match:
+            continue
+        session = int(match.group(1))
+        year = int(match.group(2))
+
+        if year in skip_years:
+            continue
+
+        for txt_file in sorted(corpus_glob(os.path.join(session_folder, "*.txt"))):
+            yield session, year, txt_file
+
+
+def _syllables(inputs):
+    # With a token cache the counts are gathered from its per-token-type table; a worker's
+    # cache misses have no token IDs yet (the parent assigns them) and are counted word by word
+    if inputs.token_cache is not None and inputs.get('word_ids') is not None:
+        return syllable_table(inputs.token_cache).gather(inputs.get('word_ids'))
+    from graphYearFleschKincaidsReadabilityEase import syllable_count
+    return [syllable_count(word) for word in inputs.get('words')]
+
+
+# Every shared input a metric can ask for, and how to compute it from the other inputs
+INPUT_PROVIDERS = {
+    'raw': lambda inputs: inputs.raw_text,
+    'cleaned': lambda inputs: preprocess_text(inputs.get('raw')),
+    # Tokens and sentence boundaries from one Punkt and one tokenizer pass, see sentenceSegmentation
+    'segmentation': lambda inputs: inputs.segment(inputs.get('cleaned')),
+    'word_ids': lambda inputs: inputs.get('segmentation').ids,
+    'words': lambda inputs: inputs.get('segmentation').words,
+    # The scripts tokenize lower-cased text, word_tokenize(text.lower()), and Treebank splits some words
+    # differently by case, so these are tokenized on their own rather than lower-cased tokens
+    'lower_segmentation': lambda inputs: inputs.segment(inputs.get('cleaned').lower()),
+    'lower_words': lambda inputs: inputs.get('lower_segmentation').words,
+    # The lexicon script rates the raw text, paragraph numbers included
+    'raw_lower_words': lambda inputs: inputs.segment(inputs.get('raw').lower()).words,
+    'sentences': lambda inputs: inputs.get('segmentation').sentences(inputs.get('cleaned')),
+    'sentence_words': lambda inputs: [[word.lower() for word in sentence]
+                                      for sentence in inputs.get('segmentation').sentence_words()],
+    'syllables': _syllables,
+    # Word-ish units from the precompiled regex, for metrics that do not need Treebank tokens
+    'regex_words': lambda inputs: regex_word_tokenize(inputs.get('cleaned')),
+    'lower_regex_words': lambda inputs: regex_word_tokenize(inputs.get('cleaned').lower()),
+    'raw_lower_regex_words': lambda inputs: regex_word_tokenize(inputs.get('raw').lower()),
+}
+
+# Tokenizer backends a word-based metric can use:
+# name -> (words input, lower-cased words input, lower-cased raw text words input)
+TOKENIZER_INPUTS = {
+    'treebank': ('words', 'lower_words', 'raw_lower_words'),
+    'regex': ('regex_words', 'lower_regex_words', 'raw_lower_regex_words'),
+}
+
+
+class SpeechInputs:
+    """Shared inputs of a single speech, each computed at most once and only when a metric needs it."""
+
+    def __init__(self, raw_text, token_cache=None, providers=None):
+        self.raw_text = raw_text
+        self.token_cache = token_cache
+        # Replacements for some INPUT_PROVIDERS, e.g. inputs read from a corpusPack.CorpusPack
+        self.providers = providers or {}
+        self._values = {}
+
+    def segment(self, text):
+        """Return the sentenceSegmentation.Segmentation of a text, from the token cache if there is one."""
+        if self.token_cache is not None:
+            return self.token_cache.segment(text)
+        return segment_text(text)
+
+    def sentence_spans(self, text):
+        """Return the sentence spans of a text from Punkt alone, for metrics that need no word tokens."""
+        if self.token_cache is not None:
+            return self.token_cache.sentence_spans(text)
+        return split_sentences(text)
+
+    def get(self, name):
+        if name not in self._values:
+            self._values[name] = self.providers.get(name, INPUT_PROVIDERS[name])(self)
+        return self._values[name]
+
+
+class Metric:
+    """A per-speech metric plugged into the engine.
+
+    Subclasses set `name`, list the shared inputs they need in `requires` and implement
+    `compute`, which returns the speech's value or None to leave the speech out. A metric
+    producing several series returns a dict of {series name: value} instead. Values that are
+    a count over a total are returned as metricStore.Ratio so the store keeps both parts.
+    `skip_years` and `skip_empty` (leave out speeches that are empty after preprocessing) follow
+    the script the metric reproduces, so its curve is the script's.
+    """
+    name = None
+    requires = ()
+    # Bump when the metric's code changes, so manifests recompute its stored values
+    version = 1
+    skip_years = (1948, 1949)
+    skip_empty = True
+
+    def compute(self, inputs):
+        raise NotImplementedError
+
+
+class WordMetric(Metric):
+    """A metric that only needs word-ish units and can run on either tokenizer backend.
+
+    With tokenizer='regex' the metric's name gets a '_regex' suffix, so manifests, stores and one
+    run's results keep both apart.
+    """
+    base_name = None
+    requires = ()
+
+    def __init__(self, tokenizer='treebank'):
+        self.tokenizer = tokenizer
+        self.words_input, self.lower_words_input, self.raw_lower_words_input = TOKENIZER_INPUTS[tokenizer]
+        self.suffix = '' if tokenizer == 'treebank' else f'_{tokenizer}'
+        self.name = f'{self.base_name}{self.suffix}'
+
+
+class LexiconRatesMetric(WordMetric):
+    """G1-G5 and T1-T2 word list rates from one scan, see lexiconMatcher.LexiconMatcher.
+
+    Like graphYearSwearWordRate, on the raw text of every file; an empty one has rate 0. The series
+    carry the tokenizer suffix too, e.g. negation_rate_regex.
+    """
+    base_name = 'lexicon_rates'
+    version = 3
+    skip_empty = False
+
+    def __init__(self, tokenizer='treebank'):
+        super().__init__(tokenizer)
+        self.requires = (self.raw_lower_words_input,)
+
+    def compute(self, inputs):
+        from graphYearSwearWordRate import lexicon_matcher
+        words = inputs.get(self.raw_lower_words_input)
+        counts = lexicon_matcher.count(words)
+        return {self.series_name(lexicon): Ratio(count, len(words)) for lexicon, count in counts.items()}
+
+    def series_name(self, lexicon):
+        """Return the name of the yearly series of a lexicon."""
+        return f'{lexicon}_rate{self.suffix}'
+
+
+class MovingTTRMetric(WordMetric):
+    """S2 moving type-token ratio, see graphYearMovingTypeTokenRatio.calculate_moving_ttr."""
+    version = 2
+
+    def __init__(self, window_size=500, tokenizer='treebank'):
+        self.window_size = window_size
+        self.base_name = f'moving_ttr_{window_size}'
+        super().__init__(tokenizer)
+        self.requires = (self.lower_words_input,)
+
+    def compute(self, inputs):
+        from graphYearMovingTypeTokenRatio import calculate_moving_ttr
+        return calculate_moving_ttr(None, self.window_size, words=inputs.get(self.lower_words_input))
+
+
+class FleschKincaidMetric(Metric):
+    """S3 Flesch-Kincaid Readability Ease, see graphYearFleschKincaidsReadabilityEase."""
+    name = 'flesch_kincaid'
+    requires = ('sentences', 'words', 'syllables')
+
+    def compute(self, inputs):
+        from graphYearFleschKincaidsReadabilityEase import calculate_flesch_kincaid
+        return calculate_flesch_kincaid(None, sentences=inputs.get('sentences'), words=inputs.get('words'),
+                                        syllables=inputs.get('syllables'))
+
+
+class ReadabilityMetric(Metric):
+    """R1-R6 readability indices from one set of per-speech counts, see readabilitySuite."""
+    name = 'readability'
+    requires = ('sentences', 'words', 'syllables', 'segmentation')
+    version = 2
+
+    def compute(self, inputs):
+        from readabilitySuite import readability_counts, readability_scores
+        return readability_scores(readability_counts(inputs.get('sentences'), inputs.get('words'),
+                                                     inputs.get('syllables'), inputs.get('segmentation').offsets))
+
+
+class NumberRateMetric(WordMetric):
+    """T3 number rate, see graphYearNumbers.extract_numbers."""
+    base_name = 'number_rate'
+    # graphYearNumbers keeps 1948 and 1949
+    skip_years = ()
+
+    def __init__(self, tokenizer='treebank'):
+        super().__init__(tokenizer)
+        self.requires = ('cleaned', self.words_input)
+
+    def compute(self, inputs):
+        from graphYearNumbers import extract_numbers
+        total_words = len(inputs.get(self.words_input))
+        # Avoid division by zero
+        if total_words == 0:
+            return None
+        return Ratio(len(extract_numbers(inputs.get('cleaned'))), total_words)
+
+
+class SentenceLengthMetric(Metric):
+    """S1 sentence length distribution: mean, median, percentiles and histogram shares from the sentence offsets.
+
+    Lengths are counted like the S1 script, with word_tokenize on every sentence on its own.
+    """
+    name = 'sentence_length'
+    version = 2
+    requires = ('cleaned', 'segmentation')
+
+    def __init__(self, bin_edges=(0, 10, 20, 30, 40, 60, 80)):
+        self.bin_edges = bin_edges
+
+    def compute(self, inputs):
+        lengths = word_tokenize_sentence_lengths(inputs.get('cleaned'), inputs.get('segmentation'))
+        stats = sentence_length_stats(lengths)
+        if stats is None:
+            return None
+        stats['sentence_length_mean'] = Ratio(int(lengths.sum()), len(lengths))
+        shares = sentence_length_histogram(lengths, self.bin_edges)
+        for low, high, share in zip(self.bin_edges, self.bin_edges[1:], shares):
+            stats[f'sentence_length_share_{low}_{high}'] = float(share)
+        return stats
+
+
+class SentimentMetric(Metric):
+    """S4 polarity and S5 subjectivity plus per-sentence spread from one sentiment pass, see sentimentLexicon.
+
+    With fast=True the compiled PatternAnalyzer lexicon scores the (cached) tokens instead of TextBlob.
+    """
+    version = 2
+
+    def __init__(self, fast=False):
+        self.fast = fast
+        self.name = 'sentiment_lexicon' if fast else 'sentiment'
+        self.requires = ('sentence_words',) if fast else ('cleaned',)
+
+    def compute(self, inputs):
+        from sentimentLexicon import sentiment_lexicon, speech_sentiment, sentiment_series
+        if self.fast:
+            return sentiment_series(*sentiment_lexicon().score(inputs.get('sentence_words')))
+        return sentiment_series(*speech_sentiment(inputs.get('cleaned')))
+
+
+class FakeNewsLikelihoodMetric(Metric):
+    """C1 BERT fake news likelihood, see graphYearFakeNewsDetectionLikelyhood.
+
+    backend and model_path choose the classifier like the script's --backend and --model-path; with
+    sentence_cache_path (see sentenceScoreCache) every unique sentence goes through the model once.
+    Both are opened on first use in every process computing the metric.
+    """
+    requires = ('raw',)
+    # Left out when empty after its own cleaning, see compute
+    skip_empty = False
+
+    def __init__(self, backend='fp32', model_path=None, sentence_cache_path=None, batch_size=64):
+        self.backend = backend
+        self.model_path = model_path
+        self.sentence_cache_path = sentence_cache_path
+        self.batch_size = batch_size
+        # Quantized and ONNX scores differ slightly from fp32, they are kept as series of their own
+        self.name = 'fake_news_likelihood' if backend == 'fp32' else f'fake_news_likelihood_{backend}'
+        self._classifier = None
+        self._sentence_cache = None
+
+    def __getstate__(self):
+        # Worker processes load their own classifier and open their own SQLite connection
+        state = dict(self.__dict__)
+        state['_classifier'] = None
+        state['_sentence_cache'] = None
+        return state
+
+    def compute(self, inputs):
+        # Imported lazily, the script loads the model on import
+        from graphYearFakeNewsDetectionLikelyhood import (remove_numbered_labels, calculate_fake_news_likelihood,
+                                                          load_classifier, sentence_cache_model_id)
+        from sentenceScoreCache import SentenceScoreCache
+        text = remove_numbered_labels(inputs.get('raw'))
+        if not text.strip():
+            return None
+        if self._classifier is None:
+            self._classifier = load_classifier(self.backend, self.model_path)
+            if self.sentence_cache_path is not None:
+                self._sentence_cache = SentenceScoreCache(self.sentence_cache_path,
+                                                          sentence_cache_model_id(self.backend, self.model_path))
+        # The shared segmentation is of differently cleaned text; split sentences only, no word tokens
+        sentences = [text[start:end] for start, end in inputs.sentence_spans(text).tolist()]
+        return calculate_fake_news_likelihood(text, self.batch_size, sentences, self._classifier, self._sentence_cache)
+
+
+def compute_inputs(inputs, metrics):
+    """Run the metrics on the SpeechInputs of one speech.
+
+    Returns {metric name: {series name: value}}, empty for a metric that left the speech out.
+    """
+    metric_values = {}
+    for metric in metrics:
+        if metric.skip_empty and not inputs.get('cleaned').strip():
+            metric_values[metric.name] = {}  # Skip empty content after preprocessing
+            continue
+        value = metric.compute(inputs)
+        if value is None:
+            metric_values[metric.name] = {}
+        else:
+            metric_values[metric.name] = value if isinstance(value, dict) else {metric.name: value}
+    return metric_values
+
+
+def compute_speech(txt_file, metrics, token_cache=None):
+    """Run the metrics on one speech file, returning {metric name: {series name: value}} like compute_inputs."""
+    return compute_text(read_corpus_text(txt_file), metrics, token_cache)
+
+
+def compute_text(raw_text, metrics, token_cache=None):
+    """Run the metrics on the text of one speech file, like compute_speech."""
+    return compute_inputs(SpeechInputs(raw_text, token_cache), metrics)
+
+
+def compute_packed_speech(pack, index, metrics, token_cache):
+    """Run the metrics on speech `index` of a corpusPack.CorpusPack, like compute_speech."""
+    return compute_inputs(pack.speech_inputs(index, token_cache), metrics)
+
+
+# Per-process state of the worker pool
+_worker_metrics = None
+_worker_token_cache = None
+_worker_pack = None
+
+
+def _init_worker(metrics, token_cache_dir, pack_dir=None):
+    global _worker_metrics, _worker_token_cache, _worker_pack
+    _worker_metrics = metrics
+    if token_cache_dir is not None:
+        # Workers only read the cache, new tokenizations are sent back to the parent to encode and store
+        from tokenCache import TokenCache
+        _worker_token_cache = TokenCache(token_cache_dir, collect_misses=True)
+    if pack_dir is not None:
+        from corpusPack import CorpusPack
+        _worker_pack = CorpusPack(pack_dir)
+
+
+def _compute_speech_in_worker(task):
+    speech, metric_names = task
+    metrics = [metric for metric in _worker_metrics if metric.name in metric_names]
+    if _worker_pack is not None:
+        metric_values = compute_packed_speech(_worker_pack, speech, metrics, _worker_token_cache)
+    else:
+        metric_values = compute_speech(speech, metrics, _worker_token_cache)
+    cache_updates = _worker_token_cache.take_collected() if _worker_token_cache is not None else ([], 0)
+    return metric_values, cache_updates
+
+
+def run_metrics(folder_path, metrics, skip_years=None, token_cache=None, workers=1, chunksize=8,
+                manifest=None, store=None, aggregates=None, pack=None, read_ahead=8):
+    """Walk the corpus once and feed every speech to all metrics.
+
+    Every metric leaves out the years of its own skip_years, unless skip_years is given for all of them.
+    Word tokens are loaded from token_cache (a tokenCache.TokenCache) when one is given.
+    With workers > 1 the speeches are spread over a process pool in chunks; results are
+    merged in corpus order, so they are identical to a serial run.
+    With a manifest (a corpusManifest.CorpusManifest) only new or changed files and metrics
+    with a new version are computed, all other per-speech values come from the manifest.
+    With a store (a metricStore.MetricStore) every per-speech value is also written there, replacing
+    the stored values of the run's metrics for the whole corpus.
+    Yearly values are accumulated in aggregates (a yearAggregates.YearAggregates, a new one unless
+    given), which also holds token-weighted means, medians and bootstrap intervals afterwards.
+    With a pack (a corpusPack.CorpusPack, see corpusPack.build_pack) speeches are read from the
+    pack instead of the session folders; it needs the token cache it was built with.
+    A serial run reads the next read_ahead files on background threads (see corpusReader.ReadAhead)
+    while the current one is computed, and reports its I/O wait against compute time.
+    Returns {metric name: (years, yearly average values)}.
+    """
+    metric_skip_years = {metric.name: set(metric.skip_years if skip_years is None else skip_years)
+                         for metric in metrics}
+    # Only years every metric leaves out are not read at all
+    skipped_years = set.intersection(*metric_skip_years.values()) if metrics else set()
+
+    if pack is not None:
+        if manifest is not None:
+            raise ValueError("A manifest tracks the session folders, it cannot be used with a corpus pack")
+        pack.check_token_cache(token_cache)
+        packed = list(pack.speeches(skipped_years))
+        speeches = [(session, year, path) for _, session, year, path in packed]
+        sources = [index for index, _, _, _ in packed]
+    else:
+        speeches = list(iter_session_files(folder_path, skipped_years))
+        sources = [txt_file for _, _, txt_file in speeches]
+
+    # Work out which metrics every file still needs
+    tasks = []
+    speech_metrics = []
+    manifest_keys = []
+    for source, (session, year, txt_file) in zip(sources, speeches):
+        year_metrics = [metric for metric in metrics if year not in metric_skip_years[metric.name]]
+        speech_metrics.append(year_metrics)
+        if manifest is None:
+            tasks.append((source, [metric.name for metric in year_metrics]))
+            continue
+        key = manifest.update_file(folder_path, session, year, txt_file)
+        manifest_keys.append(key)
+        tasks.append((txt_file, manifest.stale_metrics(key, year_metrics)))
+    if manifest is not None:
+        manifest.prune(manifest_keys)
+
+    pending_tasks = [task for task in tasks if task[1]]
+    if manifest is not None:
+        print(f"{len(pending_tasks)} of {len(tasks)} speeches need computing")
+
+    reader = None
+    if workers > 1 and pending_tasks:
+        token_cache_dir = token_cache.cache_dir if token_cache is not None else None
+        pack_dir = pack.pack_dir if pack is not None else None
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(metrics, token_cache_dir, pack_dir))
+        computed = executor.map(_compute_speech_in_worker, pending_tasks, chunksize=chunksize)
+    elif pack is not None:
+        executor = None
+        computed = ((compute_packed_speech(pack, index, [metric for metric in metrics if metric.name in metric_names],
+                                           token_cache), None)
+                    for index, metric_names in pending_tasks)
+    else:
+        executor = None
+        reader = ReadAhead([txt_file for txt_file, _ in pending_tasks], depth=read_ahead)
+        computed = ((compute_text(text, [metric for metric in metrics if metric.name in metric_names],
+                                  token_cache), None)
+                    for (_, metric_names), (_, text) in zip(pending_tasks, reader))
+
+    if aggregates is None:
+        aggregates = YearAggregates()
+    current_year = None
+    try:
+        # Both paths yield in corpus order, whatever order the workers finish in
+        for i, (session, year, txt_file) in enumerate(speeches):
+            if year != current_year:
+                print(f"Processing year: {year}")
+                current_year = year
+
+            metric_values = {}
+            if tasks[i][1]:
+                metric_values, cache_updates = next(computed)
+                if token_cache is not None and cache_updates is not None:
+                    token_cache.merge(*cache_updates)
+                if manifest is not None:
+                    manifest.record(manifest_keys[i], speech_metrics[i], metric_values)
+            if manifest is not None:
+                metric_values = manifest.values(manifest_keys[i], speech_metrics[i])
+
+            if store is not None:
+                for metric in speech_metrics[i]:
+                    store.add(session, year, txt_file, metric, metric_values[metric.name])
+            for values in metric_values.values():
+                aggregates.add(year, values)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if reader is not None:
+        reader.report()
+    if token_cache is not None:
+        token_cache.save()
+        if any('syllables' in metric.requires for metric in metrics):
+            syllable_table(token_cache).save()
+        token_cache.report()
+    if manifest is not None:
+        manifest.save()
+    if store is not None:
+        # Rows of speeches removed from the corpus or left out of a metric's years are deleted
+        store.prune(metrics)
+        store.commit()
+
+    results = {name: aggregates.curve(name) for name in aggregates.series()}
+
+    if not results:
+        print("No data found. Please check the folder path and structure.")
+    return results
+
+
+def worker_parity_report(folder_path, metrics, workers=3, speeches=40, skip_years=(1948, 1949)):
+    """Check that a run on a worker pool gives exactly the yearly values of a serial run.
+
+    A sample of speeches is copied twice into a temporary corpus, the copies one session later,
+    so workers meet texts whose token cache entries the parent wrote during the run. Both runs
+    start from an empty token cache that writes every entry right away (flush_every=1).
+    Raises AssertionError naming the series that differ.
+    """
+    import random
+    import tempfile
+    from tokenCache import TokenCache
+
+    txt_files = [txt_file for _, _, txt_file in iter_session_files(folder_path, skip_years)]
+    sample = random.Random(0).sample(txt_files, min(speeches, len(txt_files)))
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        corpus_dir = os.path.join(temporary_dir, 'corpus')
+        for session, year in ((1, 2000), (2, 2001)):
+            session_folder = os.path.join(corpus_dir, f'Session {session:02d} - {year}')
+            os.makedirs(session_folder)
+            for i, txt_file in enumerate(sample):
+                with open(os.path.join(session_folder, f'{i:04d}.txt'), 'w', encoding='utf-8') as file:
+                    file.write(read_corpus_text(txt_file))
+
+        serial = run_metrics(corpus_dir, metrics, skip_years=(), read_ahead=0,
+                             token_cache=TokenCache(os.path.join(temporary_dir, 'serial'), flush_every=1))
+        parallel = run_metrics(corpus_dir, metrics, skip_years=(), workers=workers, chunksize=1,
+                               token_cache=TokenCache(os.path.join(temporary_dir, 'parallel'), flush_every=1))
+
+    differing = sorted(name for name in serial.keys() | parallel.keys() if serial.get(name) != parallel.get(name))
+    if differing:
+        raise AssertionError(f"{workers} workers differ from a serial run in: {', '.join(differing)}")
+    print(f"{workers} workers: all {len(serial)} series identical to a serial run on {2 * len(sample)} speeches")
+
+
+def baseline_script(name, revision=None):
+    """Load a graphYear* script as it was in the repository's first commit (or at revision).
+
+    Only the functions are kept: the nltk.download calls and the example at the bottom, which
+    runs on import, are left out. Returns the script's namespace as a dict.
+    """
+    import ast
+    import subprocess
+    repository = os.path.dirname(os.path.abspath(__file__))
+    try:
+        if revision is None:
+            revision = subprocess.run(['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=repository, check=True,
+                                      capture_output=True, text=True).stdout.split()[-1]
+        source = subprocess.run(['git', 'show', f'{revision}:code/{name}.py'], cwd=repository, check=True,
+                                capture_output=True, text=True, encoding='utf-8').stdout
+    except (OSError, subprocess.CalledProcessError, IndexError) as error:
+        raise RuntimeError(f"Cannot read {name}.py at the baseline commit, this needs git and the repository history") from error
+
+    body = []
+    for node in ast.parse(source).body:
+        # The example usage starts with the folder_path assignment
+        if isinstance(node, ast.Assign) and any(getattr(target, 'id', None) == 'folder_path' for target in node.targets):
+            break
+        if isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+            continue
+        body.append(node)
+    namespace = {'__name__': f'baseline_{name}'}
+    exec(compile(ast.Module(body=body, type_ignores=[]), f'{revision}:code/{name}.py', 'exec'), namespace)
+    return namespace
+
+
+def baseline_parity_report(folder_path, token_cache=None, tolerance=1e-9, revision=None):
+    """Check that the engine's yearly curves are those of the original graphYear* scripts.
+
+    The scripts are taken from the first commit (see baseline_script), so later changes to them cannot
+    hide a difference. Runs G5 (the negation lexicon, the one the script computes), S1, S2 (window 500),
+    S3, T3 and S4/S5 with their own skip_years and compares every yearly value with the script's
+    (relative tolerance, the scripts sum in glob order). Raises AssertionError naming the series that differ.
+    """
+    import math
+
+    moving_ttr_metric = MovingTTRMetric(window_size=500)
+    number_rate_metric = NumberRateMetric()
+    results = run_metrics(folder_path, [LexiconRatesMetric(), SentenceLengthMetric(), moving_ttr_metric,
+                                        FleschKincaidMetric(), number_rate_metric, SentimentMetric()],
+                          token_cache=token_cache)
+
+    scripts = {
+        'negation_rate': 'graphYearSwearWordRate',
+        'sentence_length_mean': 'graphYearSentenceLength',
+        moving_ttr_metric.name: 'graphYearMovingTypeTokenRatio',
+        'flesch_kincaid': 'graphYearFleschKincaidsReadabilityEase',
+        number_rate_metric.name: 'graphYearNumbers',
+        'sentiment_polarity': 'graphYearSentimentPolarity',
+        'sentiment_subjectivity': 'graphYearSentimentSubjectivity',
+    }
+    differing = []
+    for name, script in scripts.items():
+        years, values = baseline_script(script, revision)['process_folder_by_session'](folder_path)
+        # The scripts list the years in folder glob order
+        baseline = dict(zip(years, values))
+        engine = dict(zip(*results.get(name, ([], []))))
+        if engine.keys() != baseline.keys() or not all(
+                math.isclose(engine[year], baseline[year], rel_tol=tolerance, abs_tol=tolerance) for year in baseline):
+            differing.append(name)
+    if differing:
+        raise AssertionError(f"Engine curves differ from the baseline scripts in: {', '.join(differing)}")
+    print(f"All {len(scripts)} series identical to the baseline scripts within {tolerance:g}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compute all metrics in a single pass over the corpus.')
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes (default: 1, serial)')
+    parser.add_argument('--tokenizer', choices=list(TOKENIZER_INPUTS), default='treebank',
+                        help='tokenizer for lexicon rates, MATTR and number rate (default: treebank)')
+    parser.add_argument('--confidence-band', action='store_true',
+                        help='draw the 95%% bootstrap confidence interval of the yearly means')
+    parser.add_argument('--read-ahead', type=int, default=8,
+                        help='number of files read ahead on background threads in a serial run (default: 8, 0 to disable)')
+    parser.add_argument('--pack', action='store_true',
+                        help='read the speeches from the corpus pack, updating it first (see corpusPack)')
+    parser.add_argument('--check-workers', action='store_true',
+                        help='first check that a worker pool gives the same values as a serial run on a corpus sample')
+    parser.add_argument('--check-baseline', action='store_true',
+                        help='first check that the engine reproduces the yearly curves of the original graphYear* scripts')
+    args = parser.parse_args()
+
+    from graphYearSwearWordRate import plot_swear_word_rate_timeline, lexicon_plots
+    from graphYearMovingTypeTokenRatio import plot_ttr_timeline
+    from graphYearFleschKincaidsReadabilityEase import plot_fk_re_timeline
+    from readabilitySuite import READABILITY_FORMULAS
+    from graphYearNumbers import plot_number_density_timeline
+    from graphYearSentimentPolarity import plot_sentiment_polarity_timeline
+    from graphYearSentimentSubjectivity import plot_sentiment_subjectivity_timeline
+    from tokenCache import TokenCache
+    from corpusManifest import CorpusManifest
+    from metricStore import MetricStore
+    from corpusPack import build_pack
+
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
+    output_folder = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs'  # Folder to save the SVG files
+    token_cache = TokenCache(r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\tokenCache')  # Folder for cached tokenizations
+    manifest = CorpusManifest(r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\manifest.json')  # Per-speech values of earlier runs
+    store = MetricStore(r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\speechMetrics.sqlite')  # Per-speech table for later queries
+    pack = None
+    if args.pack:
+        # The pack takes over the manifest's job of only reading what changed
+        pack = build_pack(folder_path, r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\corpusPack', token_cache)
+        manifest = None
+    moving_ttr_metric = MovingTTRMetric(window_size=500, tokenizer=args.tokenizer)
+    number_rate_metric = NumberRateMetric(tokenizer=args.tokenizer)
+    lexicon_rates_metric = LexiconRatesMetric(tokenizer=args.tokenizer)
+    metrics = [
+        lexicon_rates_metric,
+        moving_ttr_metric,
+        FleschKincaidMetric(),
+        ReadabilityMetric(),
+        number_rate_metric,
+        SentimentMetric(),
+    ]
+    if args.check_workers:
+        worker_parity_report(folder_path, metrics, workers=max(args.workers, 2))
+    if args.check_baseline:
+        baseline_parity_report(folder_path, token_cache)
+    aggregates = YearAggregates()
+    results = run_metrics(folder_path, metrics, token_cache=token_cache, workers=args.workers, manifest=manifest,
+                          store=store, aggregates=aggregates, pack=pack, read_ahead=args.read_ahead)
+
+    def band(series):
+        return aggregates.confidence_band(series)[1:] if args.confidence_band else None
+
+    for lexicon, (title, file_name) in lexicon_plots.items():
+        series = lexicon_rates_metric.series_name(lexicon)
+        plot_swear_word_rate_timeline(*results[series], os.path.join(output_folder, file_name), title, band=band(series))
+    plot_ttr_timeline(*results[moving_ttr_metric.name], os.path.join(output_folder, 'window_size_500_s2_average_moving_ttr_1946_2022.svg'),
+                      band=band(moving_ttr_metric.name))
+    plot_fk_re_timeline(*results['flesch_kincaid'], os.path.join(output_folder, 's3_flesch_kincaid_readability_1946_2022.svg'),
+                        band=band('flesch_kincaid'))
+    for name, (_, title, file_name) in READABILITY_FORMULAS.items():
+        plot_fk_re_timeline(*results[name], os.path.join(output_folder, file_name), title, band=band(name))
+    plot_number_density_timeline(*results[number_rate_metric.name], os.path.join(output_folder, 't3_number_density_1946_2022.svg'),
+                                 band=band(number_rate_metric.name))
+    plot_sentiment_polarity_timeline(*results['sentiment_polarity'], os.path.join(output_folder, 's4_sentiment_polarity_1946_2022.svg'),
+                                     band=band('sentiment_polarity'))
+    plot_sentiment_subjectivity_timeline(*results['sentiment_subjectivity'], os.path.join(output_folder, 's5_sentiment_subjectivity_1946_2022.svg'),
+                                         band=band('sentiment_subjectivity'))
@@ -0,0 +1,91 @@
+import os
+import json
+import hashlib
+from metricStore import Ratio
+from corpusReader import corpus_stat, open_corpus_file
+
+
+def file_sha1(path):
+    """Return the SHA-1 hex digest of a corpus file's (uncompressed) bytes."""
+    digest = hashlib.sha1()
+    with open_corpus_file(path) as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CorpusManifest:
+    """JSON record of every speech file (size, mtime, content hash) and its per-speech metric values.
+
+    A rerun only computes metrics for files that are new or whose content changed, and for metrics
+    whose `version` differs from the one stored; everything else is read back from the manifest.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                self.files = json.load(file)['files']
+
+    def update_file(self, folder_path, session, year, txt_file):
+        """Refresh the entry of one speech file and return its manifest key.
+
+        The file is only hashed when its size or mtime changed; if the hash changed too, its
+        stored metric values are dropped.
+        """
+        key = os.path.relpath(txt_file, folder_path)
+        size, mtime = corpus_stat(txt_file)
+        entry = self.files.get(key)
+
+        if entry is not None and entry['size'] == size and entry['mtime'] == mtime:
+            return key
+
+        sha1 = file_sha1(txt_file)
+        if entry is None or entry['sha1'] != sha1:
+            entry = {'sha1': sha1, 'session': session, 'year': year, 'metrics': {}}
+            self.files[key] = entry
+        entry['size'] = size
+        entry['mtime'] = mtime
+        return key
+
+    def stale_metrics(self, key, metrics):
+        """Return the names of the metrics that have to be computed for a file."""
+        stored = self.files[key]['metrics']
+        return [metric.name for metric in metrics
+                if metric.name not in stored or stored[metric.name]['version'] != metric.version]
+
+    def record(self, key, metrics, metric_values):
+        """Store freshly computed {metric name: {series name: value}} of a file."""
+        entry = self.files[key]
+        versions = {metric.name: metric.version for metric in metrics}
+        for name, values in metric_values.items():
+            # JSON keeps Ratio values as plain floats, their parts are stored next to them
+            ratios = {series: [value.numerator, value.denominator] for series, value in values.items()
+                      if isinstance(value, Ratio)}
+            entry['metrics'][name] = {'version': versions[name], 'values': values, 'ratios': ratios}
+
+    def values(self, key, metrics):
+        """Return the stored {metric name: {series name: value}} of a file."""
+        entry = self.files[key]
+        metric_values = {}
+        for metric in metrics:
+            stored = entry['metrics'][metric.name]
+            values = dict(stored['values'])
+            for series, (numerator, denominator) in stored.get('ratios', {}).items():
+                values[series] = Ratio(numerator, denominator)
+            metric_values[metric.name] = values
+        return metric_values
+
+    def prune(self, keys):
+        """Forget files that are no longer part of the corpus."""
+        keys = set(keys)
+        for key in list(self.files):
+            if key not in keys:
+                del self.files[key]
+
+    def save(self):
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump({'files': self.files}, file)
+        os.replace(temporary_path, self.path)
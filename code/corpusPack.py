@@ -0,0 +1,262 @@
+import os
+import numpy as np
+from corpusEngine import SpeechInputs, iter_session_files, preprocess_text
+from corpusManifest import file_sha1
+from corpusReader import corpus_stat, open_corpus_text
+from metricStore import country_of
+from sentenceSegmentation import Segmentation
+from tokenCache import TOKENIZER_VERSION
+
+# Bump when the pack's columns change, so older packs are rebuilt
+PACK_FORMAT = 2
+# Per-speech metadata columns, stored together in speeches.npz
+METADATA_COLUMNS = ('session', 'year', 'country', 'path', 'size', 'mtime', 'sha1', 'empty',
+                    'raw_offsets', 'cleaned_offsets', 'token_offsets', 'sentence_offsets',
+                    'lower_token_offsets', 'lower_sentence_offsets', 'raw_lower_token_offsets')
+# Corpus-wide columns, one .npy file each, read memory-mapped, and the offsets column splitting them by speech
+DATA_COLUMNS = {
+    'raw_text': 'raw_offsets',
+    'cleaned_text': 'cleaned_offsets',
+    'token_ids': 'token_offsets',
+    'sentence_ends': 'sentence_offsets',
+    'sentence_spans': 'sentence_offsets',
+    # Segmentation of the lower-cased cleaned text (the engine's 'lower_segmentation')
+    'lower_token_ids': 'lower_token_offsets',
+    'lower_sentence_ends': 'lower_sentence_offsets',
+    'lower_sentence_spans': 'lower_sentence_offsets',
+    # Tokens of the lower-cased raw text (the engine's 'raw_lower_words')
+    'raw_lower_token_ids': 'raw_lower_token_offsets',
+}
+# Trailing dimensions of columns that are not flat
+COLUMN_SHAPES = {'sentence_spans': (2,), 'lower_sentence_spans': (2,)}
+
+
+class CorpusPack:
+    """The whole corpus as a few memory-mapped columns instead of thousands of small text files.
+
+    Holds the raw and cleaned UTF-8 text of every speech, its token IDs and sentence boundaries
+    (the engine's 'segmentation' input), the same of its lower-cased text and the token IDs of its
+    lower-cased raw text, and per-speech session, year and country columns.
+    Speech i's tokens are token_ids[token_offsets[i]:token_offsets[i + 1]], a view of the mapped
+    file. Token IDs refer to the vocabulary of the tokenCache.TokenCache the pack was built with.
+    The session folders stay the source of truth; build_pack brings the pack up to date with them.
+    """
+
+    def __init__(self, pack_dir):
+        self.pack_dir = pack_dir
+        self.metadata_path = os.path.join(pack_dir, 'speeches.npz')
+        self.tokenizer_version = None
+        self.vocabulary_size = 0
+        self.columns = {}
+        if os.path.exists(self.metadata_path):
+            self._open()
+
+    def _column_path(self, column):
+        return os.path.join(self.pack_dir, column + '.npy')
+
+    def _open(self):
+        with np.load(self.metadata_path) as metadata:
+            if 'pack_format' not in metadata or int(metadata['pack_format']) != PACK_FORMAT:
+                print("Corpus pack has an older format, it will be rebuilt")
+                return
+            columns = {column: metadata[column] for column in METADATA_COLUMNS}
+            self.tokenizer_version = str(metadata['tokenizer_version'])
+            self.vocabulary_size = int(metadata['vocabulary_size'])
+        for column in DATA_COLUMNS:
+            columns[column] = np.load(self._column_path(column), mmap_mode='r')
+        # A build interrupted between writing columns leaves them inconsistent, the pack is then rebuilt
+        if any(columns[offsets][-1] != len(columns[column]) for column, offsets in DATA_COLUMNS.items()):
+            print("Corpus pack is incomplete, it will be rebuilt")
+            return
+        self.columns = columns
+
+    def close(self):
+        """Drop the mapped columns, so their files can be replaced."""
+        self.columns = {}
+
+    def __len__(self):
+        return len(self.columns['session']) if self.columns else 0
+
+    def speeches(self, skip_years=(1948, 1949)):
+        """Yield (index, session, year, path) of every speech, in the order of corpusEngine.iter_session_files."""
+        for index in range(len(self)):
+            year = int(self.columns['year'][index])
+            if year not in skip_years:
+                yield index, int(self.columns['session'][index]), year, str(self.columns['path'][index])
+
+    def is_empty(self, index):
+        """Whether a speech is empty after preprocessing."""
+        return bool(self.columns['empty'][index])
+
+    def _speech_range(self, column, index):
+        offsets = self.columns[DATA_COLUMNS[column]]
+        return offsets[index], offsets[index + 1]
+
+    def _text(self, column, index):
+        start, end = self._speech_range(column, index)
+        return self.columns[column][start:end].tobytes().decode('utf-8')
+
+    def raw_text(self, index):
+        return self._text('raw_text', index)
+
+    def cleaned_text(self, index):
+        return self._text('cleaned_text', index)
+
+    def token_ids(self, index, column='token_ids'):
+        """Token IDs of a speech, a view of the mapped column."""
+        start, end = self._speech_range(column, index)
+        return self.columns[column][start:end]
+
+    def segmentation(self, index, token_cache, lower=False):
+        """Return the sentenceSegmentation.Segmentation of a speech's cleaned (lower-cased) text."""
+        prefix = 'lower_' if lower else ''
+        start, end = self._speech_range(prefix + 'sentence_ends', index)
+        ids = self.token_ids(index, prefix + 'token_ids')
+        offsets = np.concatenate(([0], self.columns[prefix + 'sentence_ends'][start:end]))
+        return Segmentation(token_cache.decode(ids), offsets, self.columns[prefix + 'sentence_spans'][start:end], ids)
+
+    def speech_inputs(self, index, token_cache):
+        """Return corpusEngine.SpeechInputs of a speech whose text and tokens come from the pack."""
+        return SpeechInputs(None, token_cache, providers={
+            'raw': lambda inputs: self.raw_text(index),
+            'cleaned': lambda inputs: self.cleaned_text(index),
+            'segmentation': lambda inputs: self.segmentation(index, token_cache),
+            'lower_segmentation': lambda inputs: self.segmentation(index, token_cache, lower=True),
+            'raw_lower_words': lambda inputs: token_cache.decode(self.token_ids(index, 'raw_lower_token_ids')),
+        })
+
+    def check_token_cache(self, token_cache):
+        """Raise ValueError unless the pack's token IDs can be decoded with token_cache."""
+        if token_cache is None:
+            raise ValueError("A corpus pack is read with the token cache it was built with")
+        if self.tokenizer_version != TOKENIZER_VERSION or len(token_cache.vocabulary) < self.vocabulary_size:
+            raise ValueError(f"The corpus pack in {self.pack_dir} was built with another tokenizer or token cache, "
+                             "rebuild it with build_pack")
+
+
+def _pack_speech(txt_file, token_cache):
+    """Read, clean and segment one speech file, returning its pack columns."""
+    # Read like compute_speech does, newlines translated
+    with open_corpus_text(txt_file) as file:
+        raw_text = file.read()
+    cleaned = preprocess_text(raw_text)
+    empty = not cleaned.strip()
+    columns = {
+        'empty': empty,
+        'raw_text': np.frombuffer(raw_text.encode('utf-8'), dtype=np.uint8),
+        'cleaned_text': np.frombuffer(cleaned.encode('utf-8'), dtype=np.uint8),
+        # Lexicon rates also count the (raw) words of speeches that are empty after cleaning
+        'raw_lower_token_ids': token_cache.segment(raw_text.lower()).ids,
+    }
+    for prefix, text in (('', cleaned), ('lower_', cleaned.lower())):
+        segmentation = None if empty else token_cache.segment(text)
+        columns[prefix + 'token_ids'] = np.zeros(0, dtype=np.uint32) if empty else segmentation.ids
+        columns[prefix + 'sentence_ends'] = np.zeros(0, dtype=np.int64) if empty else segmentation.offsets[1:]
+        columns[prefix + 'sentence_spans'] = np.zeros((0, 2), dtype=np.int64) if empty else segmentation.spans
+    return columns
+
+
+def build_pack(folder_path, pack_dir, token_cache):
+    """Create or update the corpus pack of the session folders and return it as a CorpusPack.
+
+    All years are packed; skip_years is applied when reading. Speeches whose file size and
+    mtime (or, failing that, content hash) are unchanged are copied over from the existing pack,
+    only new and changed files are read and tokenized.
+    """
+    os.makedirs(pack_dir, exist_ok=True)
+    pack = CorpusPack(pack_dir)
+    reusable = {}
+    if pack.columns and pack.tokenizer_version == TOKENIZER_VERSION:
+        reusable = {str(path): index for index, path in enumerate(pack.columns['path'])}
+
+    metadata = {column: [] for column in ('session', 'year', 'country', 'path', 'size', 'mtime', 'sha1', 'empty')}
+    # Every speech is (pack index to copy from, None) or (None, freshly packed columns)
+    sources = []
+    packed_count = 0
+    for session, year, txt_file in iter_session_files(folder_path, skip_years=()):
+        path = os.path.relpath(txt_file, folder_path)
+        size, mtime = corpus_stat(txt_file)
+        index = reusable.get(path)
+        sha1 = None
+        if index is not None and (pack.columns['size'][index] != size or pack.columns['mtime'][index] != mtime):
+            sha1 = file_sha1(txt_file)
+            if sha1 != pack.columns['sha1'][index]:
+                index = None
+
+        if index is not None:
+            sources.append((index, None))
+            empty = pack.is_empty(index)
+            sha1 = sha1 or str(pack.columns['sha1'][index])
+        else:
+            columns = _pack_speech(txt_file, token_cache)
+            sources.append((None, columns))
+            empty = columns['empty']
+            sha1 = sha1 or file_sha1(txt_file)
+            packed_count += 1
+        for column, value in (('session', session), ('year', year), ('country', country_of(txt_file)),
+                              ('path', path), ('size', size), ('mtime', mtime),
+                              ('sha1', sha1), ('empty', empty)):
+            metadata[column].append(value)
+
+    if pack.columns and packed_count == 0 and metadata['path'] == [str(path) for path in pack.columns['path']]:
+        # Same speeches in the same order, at most their mtimes moved: the columns stay as they are
+        _write_metadata(pack, metadata, pack.columns, token_cache)
+        print(f"Corpus pack: {len(sources)} speeches, up to date")
+        return CorpusPack(pack_dir)
+
+    # Token IDs refer to the cache's vocabulary, which has to be on disk before the pack is
+    token_cache.save()
+
+    def column_parts(column):
+        for index, columns in sources:
+            if columns is not None:
+                yield columns[column]
+            else:
+                start, end = pack._speech_range(column, index)
+                yield pack.columns[column][start:end]
+
+    offsets = {}
+    for column, offsets_column in DATA_COLUMNS.items():
+        column_offsets = np.cumsum([0] + [len(part) for part in column_parts(column)], dtype=np.int64)
+        offsets[offsets_column] = column_offsets
+        shape = (int(column_offsets[-1]),) + COLUMN_SHAPES.get(column, ())
+        dtype = np.uint8 if column.endswith('text') else np.uint32 if column.endswith('token_ids') else np.int64
+        # Filled speech by speech, so neither the old nor the new pack has to fit in memory
+        temporary = np.lib.format.open_memmap(_temporary_path(pack, column), mode='w+', dtype=dtype, shape=shape)
+        for part, start, end in zip(column_parts(column), column_offsets[:-1], column_offsets[1:]):
+            temporary[start:end] = part
+        temporary.flush()
+        del temporary
+
+    # The old columns are still mapped by the pack; they have to be released before replacing them
+    pack.close()
+    for column in DATA_COLUMNS:
+        os.replace(_temporary_path(pack, column), pack._column_path(column))
+    _write_metadata(pack, metadata, offsets, token_cache)
+    print(f"Corpus pack: {len(sources)} speeches, {packed_count} packed from their files")
+    return CorpusPack(pack_dir)
+
+
+def _temporary_path(pack, column):
+    return os.path.join(pack.pack_dir, column + '.tmp.npy')
+
+
+def _write_metadata(pack, metadata, offsets, token_cache):
+    columns = {column: np.array(values) for column, values in metadata.items()}
+    columns['session'] = columns['session'].astype(np.int64)
+    columns['year'] = columns['year'].astype(np.int64)
+    for column in set(DATA_COLUMNS.values()):
+        columns[column] = np.asarray(offsets[column])
+    temporary_path = pack.metadata_path + '.tmp.npz'
+    np.savez(temporary_path, pack_format=PACK_FORMAT, tokenizer_version=TOKENIZER_VERSION,
+             vocabulary_size=len(token_cache.vocabulary), **columns)
+    os.replace(temporary_path, pack.metadata_path)
+
+
+if __name__ == '__main__':
+    from tokenCache import TokenCache
+
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
+    token_cache = TokenCache(r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\tokenCache')  # Folder for cached tokenizations
+    build_pack(folder_path, r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\corpusPack', token_cache)
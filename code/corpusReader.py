@@ -0,0 +1,409 @@
+import os
+import io
+import re
+import glob
+import gzip
+import fnmatch
+import functools
+import time
+import tarfile
+import zipfile
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# A path component ending in one of these is read as an archive, the rest of the path is inside it
+ARCHIVE_PATTERN = re.compile(r'^(.*?\.(?:zip|tar|tar\.gz|tgz|tar\.zst))(?:[\\/](.*))?$', re.IGNORECASE)
+# Individually compressed files (USA.txt.gz) are listed and opened under their uncompressed name (USA.txt)
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+
+
+def _zstd_reader(file):
+    # Optional dependency, only needed for .zst files
+    import zstandard
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(file))
+
+
+class _GzipFile(gzip.GzipFile):
+    """GzipFile that also closes the file it decompresses."""
+
+    def close(self):
+        file = self.fileobj
+        try:
+            super().close()
+        finally:
+            if file is not None:
+                file.close()
+
+
+def _decompressed(file, name):
+    """Wrap a binary file in streaming decompression according to its name."""
+    if name.endswith('.gz'):
+        return _GzipFile(fileobj=file)
+    if name.endswith('.zst'):
+        return _zstd_reader(file)
+    return file
+
+
+def _logical_name(name):
+    if name.endswith(COMPRESSED_SUFFIXES) and not ARCHIVE_PATTERN.match(name):
+        return os.path.splitext(name)[0]
+    return name
+
+
+class _Archive:
+    """Members of an archive under their logical names, plus the folders they are in."""
+
+    def __init__(self):
+        # logical name -> stored member name, None for folders
+        self.entries = {'': None}
+
+    @staticmethod
+    def _normalize(name):
+        return name[2:] if name.startswith('./') else name
+
+    def _add_member(self, name):
+        name = self._normalize(name)
+        parts = name.split('/')
+        for depth in range(1, len(parts)):
+            self.entries.setdefault('/'.join(parts[:depth]), None)
+        self.entries[_logical_name(name)] = name
+        return name
+
+    def member(self, name):
+        member = self.entries.get(name)
+        if member is None:
+            raise FileNotFoundError(name)
+        return member
+
+
+class _ZipArchive(_Archive):
+    def __init__(self, path):
+        super().__init__()
+        self.zip = zipfile.ZipFile(path)
+        self.infos = {}
+        for info in self.zip.infolist():
+            if not info.is_dir():
+                self.infos[self._add_member(info.filename)] = info
+
+    def open(self, name):
+        member = self.member(name)
+        return _decompressed(self.zip.open(self.infos[member]), member)
+
+    def stat(self, name):
+        info = self.infos[self.member(name)]
+        return info.file_size, int(datetime(*info.date_time).timestamp()) * 10 ** 9
+
+
+class _FileSection(io.RawIOBase):
+    """size bytes of a file from offset on, read through a file handle of its own."""
+
+    def __init__(self, path, offset, size):
+        self._file = open(path, 'rb')
+        self._file.seek(offset)
+        self._remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self._file.readinto(memoryview(buffer)[:self._remaining])
+        self._remaining -= count
+        return count
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class _StreamedMember(io.RawIOBase):
+    """A member of a compressed tar read in place from its stream, which stays locked until it is closed."""
+
+    def __init__(self, archive, file):
+        self._archive = archive
+        self._file = file
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._file.readinto(buffer)
+
+    def close(self):
+        if not self.closed:
+            self._archive._streaming = False
+            self._archive._lock.release()
+        super().close()
+
+
+class _TarArchive(_Archive):
+    """A .tar, .tar.gz or .tar.zst.
+
+    An uncompressed .tar is indexed once and every member is read by seeking to it. A compressed
+    one can only be read front to back, so its members have to be stored sorted by name
+    (tar --sort=name), the order the scripts walk the corpus in: one pass lists them, the next
+    reads them. An unsorted one is refused rather than decompressed again for nearly every file.
+    Members passed on the way to a requested one are kept for a while, so the slightly out of
+    order requests of ReadAhead threads do not restart the stream. Members of stream_size bytes
+    or more are streamed instead of read whole; nothing else can be read until they are closed.
+    """
+    skipped_limit = 64
+    stream_size = 4 << 20
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.infos = {}
+        if path.lower().endswith('.tar'):
+            # member -> (offset of its data, size)
+            self.offsets = {}
+            with tarfile.open(path, mode='r:') as tar:
+                for info in tar:
+                    if info.isfile():
+                        member = self._add_member(info.name)
+                        self.infos[member] = (info.size, int(info.mtime) * 10 ** 9)
+                        self.offsets[member] = (info.offset_data, info.size)
+            return
+
+        self.offsets = None
+        self.order = {}
+        self._stream = None
+        self._streaming = False
+        self._skipped = OrderedDict()
+        self._lock = threading.RLock()
+        self._open_stream()
+        for info in self._stream:
+            if info.isfile():
+                member = self._add_member(info.name)
+                self.infos[member] = (info.size, int(info.mtime) * 10 ** 9)
+                self.order[member] = len(self.order)
+        self._close_stream()
+
+        # The corpus is walked folder by folder, each in sorted order
+        keys = [tuple(_logical_name(member).split('/')) for member in self.order]
+        if any(later < earlier for earlier, later in zip(keys, keys[1:])):
+            raise ValueError(f"The files in {path} are not stored sorted by name. A compressed tar can only be "
+                             "read front to back, so it would be decompressed again for nearly every file; "
+                             "repack it with tar --sort=name or extract it")
+
+    def _open_stream(self):
+        file = open(self.path, 'rb')
+        if self.path.lower().endswith('.zst'):
+            file = _zstd_reader(file)
+        # 'r|*' reads the archive strictly forward and detects gzip compression itself
+        self._stream = tarfile.open(fileobj=file, mode='r|*')
+        self._file = file
+        self._position = 0
+
+    def _close_stream(self):
+        self._stream.close()
+        self._file.close()
+        self._stream = None
+
+    def open(self, name):
+        member = self.member(name)
+        if self.offsets is not None:
+            offset, size = self.offsets[member]
+            return _decompressed(io.BufferedReader(_FileSection(self.path, offset, size)), member)
+
+        # Other threads wait here while a member is streamed; the thread streaming it would wait forever
+        self._lock.acquire()
+        try:
+            if self._streaming:
+                raise RuntimeError(f"{name} was opened while another member of {self.path} is still being read; "
+                                   "close that one first")
+            data = self._read(member)
+        except BaseException:
+            self._lock.release()
+            raise
+        if isinstance(data, bytes):
+            self._lock.release()
+            return _decompressed(io.BytesIO(data), member)
+        # The stream stays locked until the member is closed
+        self._streaming = True
+        return _decompressed(io.BufferedReader(_StreamedMember(self, data)), member)
+
+    def _read(self, member):
+        """Return the bytes of a member, or a file reading it from the stream if it is large."""
+        if member in self._skipped:
+            return self._skipped.pop(member)
+        if self._stream is None or self.order[member] < self._position:
+            # Asking for an earlier member starts a new pass over the archive
+            if self._stream is not None:
+                self._close_stream()
+            self._open_stream()
+        while True:
+            info = self._stream.next()
+            if info is None:
+                raise FileNotFoundError(member)
+            if not info.isfile():
+                continue
+            name = self._normalize(info.name)
+            self._position = self.order[name] + 1
+            if name == member:
+                if info.size >= self.stream_size:
+                    return self._stream.extractfile(info)
+                return self._stream.extractfile(info).read()
+            # A member of a stream can only be read before the stream moves on
+            if info.size < self.stream_size:
+                self._skipped[name] = self._stream.extractfile(info).read()
+                if len(self._skipped) > self.skipped_limit:
+                    self._skipped.popitem(last=False)
+
+    def stat(self, name):
+        return self.infos[self.member(name)]
+
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def _split(path):
+    """Return (archive, archive path, member path inside it with '/' separators), or (None, None, path)."""
+    match = ARCHIVE_PATTERN.match(path)
+    if match is None or not os.path.isfile(match.group(1)):
+        return None, None, path
+    archive_path = match.group(1)
+    with _archives_lock:
+        archive = _archives.get(archive_path)
+        if archive is None:
+            if archive_path.lower().endswith('.zip'):
+                archive = _ZipArchive(archive_path)
+            else:
+                archive = _TarArchive(archive_path)
+            _archives[archive_path] = archive
+    member = (match.group(2) or '').replace('\\', '/').strip('/')
+    return archive, archive_path, member
+
+
+def _resolve(path):
+    """Return the path of the file on disk holding path, which may be a compressed copy."""
+    if os.path.exists(path):
+        return path
+    for suffix in COMPRESSED_SUFFIXES:
+        if os.path.exists(path + suffix):
+            return path + suffix
+    raise FileNotFoundError(path)
+
+
+def corpus_glob(pattern):
+    """glob.glob that also looks inside archives and lists compressed files under their uncompressed name."""
+    archive, archive_path, member_pattern = _split(pattern)
+    if archive is not None:
+        depth = member_pattern.count('/')
+        return [os.path.join(archive_path, *name.split('/')) for name in sorted(archive.entries)
+                if name and name.count('/') == depth and fnmatch.fnmatchcase(name, member_pattern)]
+
+    paths = glob.glob(pattern)
+    listed = set(paths)
+    for suffix in COMPRESSED_SUFFIXES:
+        for path in glob.glob(pattern + suffix):
+            path = _logical_name(path)
+            if path not in listed:
+                listed.add(path)
+                paths.append(path)
+    return paths
+
+
+def corpus_listdir(path):
+    """os.listdir for folders on disk or inside archives, with compressed files under their uncompressed name."""
+    archive, _, member = _split(path)
+    if archive is not None:
+        prefix = member + '/' if member else ''
+        return [name[len(prefix):] for name in sorted(archive.entries)
+                if name.startswith(prefix) and name != member and '/' not in name[len(prefix):]]
+    return list(dict.fromkeys(_logical_name(name) for name in os.listdir(path)))
+
+
+def corpus_isdir(path):
+    """os.path.isdir for folders on disk or inside archives; an archive itself counts as a folder."""
+    archive, _, member = _split(path)
+    if archive is not None:
+        return member in archive.entries and archive.entries[member] is None
+    return os.path.isdir(path)
+
+
+def open_corpus_file(path):
+    """Open a corpus file for binary reading, wherever it is stored, decompressing it on the fly."""
+    archive, _, member = _split(path)
+    if archive is not None:
+        return archive.open(member)
+    path = _resolve(path)
+    return _decompressed(open(path, 'rb'), path)
+
+
+def open_corpus_text(path):
+    """Drop-in replacement for open(path, 'r', encoding='utf-8') on corpus files."""
+    return io.TextIOWrapper(open_corpus_file(path), encoding='utf-8')
+
+
+def corpus_stat(path):
+    """Return (size, mtime in ns) of a corpus file as stored, to tell whether it changed."""
+    archive, _, member = _split(path)
+    if archive is not None:
+        return archive.stat(member)
+    stat = os.stat(_resolve(path))
+    return stat.st_size, stat.st_mtime_ns
+
+
+def read_corpus_text(path):
+    """Return the text of a corpus file."""
+    with open_corpus_text(path) as file:
+        return file.read()
+
+
+class ReadAhead:
+    """Read corpus files on background threads while the caller works on the ones read before.
+
+    Iterating yields (path, text) in the order of paths, with at most `depth` files read ahead
+    (depth=0 reads every file when it is needed). The time the caller waited for a file to be
+    read (I/O wait) and the time it spent between files (compute) are summed for report().
+    """
+
+    def __init__(self, paths, depth=8, threads=4):
+        self.paths = paths
+        self.depth = depth
+        self.threads = max(1, min(threads, depth))
+        self.io_wait = 0.0
+        self.compute = 0.0
+        self.files = 0
+
+    def __iter__(self):
+        for path, read in self._reads():
+            waiting = time.perf_counter()
+            text = read()
+            handed_over = time.perf_counter()
+            self.io_wait += handed_over - waiting
+            self.files += 1
+            yield path, text
+            # The caller works on the file while this generator is suspended
+            self.compute += time.perf_counter() - handed_over
+
+    def _reads(self):
+        """Yield (path, function returning its text), with the reads of the next depth files submitted."""
+        if self.depth == 0:
+            for path in self.paths:
+                yield path, functools.partial(read_corpus_text, path)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            pending = deque()
+            try:
+                for path in self.paths:
+                    pending.append((path, executor.submit(read_corpus_text, path)))
+                    if len(pending) > self.depth:
+                        path, future = pending.popleft()
+                        yield path, future.result
+                while pending:
+                    path, future = pending.popleft()
+                    yield path, future.result
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def report(self):
+        total = self.io_wait + self.compute
+        share = self.io_wait / total if total else 0
+        print(f"Read-ahead ({self.depth} files): {self.files} files, {self.io_wait:.1f}s waiting for I/O, "
+              f"{self.compute:.1f}s computing ({share:.1%} I/O wait)")
@@ -0,0 +1,135 @@
+import os
+import csv
+import mmap
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from corpusEngine import iter_session_files
+from corpusReader import open_corpus_file
+
+# Every character str.split() splits on, as UTF-8 bytes: single-byte ones in a lookup table,
+# multi-byte ones (no-break space, U+2000-U+200A, ...) as integer keys of their byte sequence
+ASCII_WHITESPACE = np.array([chr(byte).isspace() for byte in range(256)]) & (np.arange(256) < 0x80)
+MULTIBYTE_WHITESPACE = [chr(code).encode('utf-8') for code in range(0x80, 0x10000) if chr(code).isspace()]
+WHITESPACE_LEAD_BYTES = np.array(sorted({sequence[0] for sequence in MULTIBYTE_WHITESPACE}), dtype=np.uint8)
+WHITESPACE_KEYS = {length: np.array([int.from_bytes(sequence, 'big') for sequence in MULTIBYTE_WHITESPACE
+                                     if len(sequence) == length], dtype=np.int64)
+                   for length in {len(sequence) for sequence in MULTIBYTE_WHITESPACE}}
+
+
+def count_buffer(data):
+    """Return (tokens, lines) of UTF-8 bytes as a uint8 array: len(text.split()) and the number of newlines."""
+    if len(data) == 0:
+        return 0, 0
+    # Every ASCII whitespace byte is <= 0x20; the control bytes in that range that are not are rare
+    is_space = data <= 0x20
+    controls = (data < 0x09) | ((data > 0x0D) & (data < 0x1C))
+    if controls.any():
+        is_space &= ASCII_WHITESPACE[data]
+
+    # Multi-byte whitespace is rare; only the positions of its lead bytes are looked at
+    candidates = np.flatnonzero(data >= WHITESPACE_LEAD_BYTES[0])
+    candidates = candidates[np.isin(data[candidates], WHITESPACE_LEAD_BYTES)]
+    if len(candidates):
+        padded = np.concatenate([data, np.zeros(2, dtype=np.uint8)]).astype(np.int64)
+        for length, keys in WHITESPACE_KEYS.items():
+            sequence_keys = np.zeros(len(candidates), dtype=np.int64)
+            for offset in range(length):
+                sequence_keys = (sequence_keys << 8) | padded[candidates + offset]
+            for start in candidates[np.isin(sequence_keys, keys)]:
+                is_space[start:start + length] = True
+
+    # A token starts at every non-whitespace byte that follows whitespace or the start of the text
+    token_starts = ~is_space
+    token_starts[1:] &= is_space[:-1]
+    return int(np.count_nonzero(token_starts)), int(np.count_nonzero(data == 0x0A))
+
+
+def count_file(txt_file):
+    """Return (tokens, lines, bytes) of a corpus file, counted on its raw bytes without decoding."""
+    if os.path.isfile(txt_file):
+        size = os.path.getsize(txt_file)
+        if size == 0:
+            return 0, 0, 0
+        with open(txt_file, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            data = np.frombuffer(buffer, dtype=np.uint8)
+            counts = count_buffer(data)
+            # The array has to go before the map can be closed
+            del data
+        return counts + (size,)
+
+    # Files inside archives or compressed on disk are decompressed into memory instead
+    with open_corpus_file(txt_file) as file:
+        content = file.read()
+    return count_buffer(np.frombuffer(content, dtype=np.uint8)) + (len(content),)
+
+
+def corpus_statistics(folder_path, workers=1, chunksize=16):
+    """Count speeches, tokens, lines and bytes of every session, counting files in parallel.
+
+    Returns ({(session, year): {'speeches', 'tokens', 'lines', 'bytes'}}, per-speech token counts,
+    per-speech byte counts). Unlike the metric scripts, no year is skipped.
+    """
+    speeches = list(iter_session_files(folder_path, skip_years=()))
+    txt_files = [txt_file for _, _, txt_file in speeches]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            file_counts = list(executor.map(count_file, txt_files, chunksize=chunksize))
+    else:
+        file_counts = [count_file(txt_file) for txt_file in txt_files]
+
+    sessions = {}
+    for (session, year, _), (tokens, lines, size) in zip(speeches, file_counts):
+        totals = sessions.setdefault((session, year), {'speeches': 0, 'tokens': 0, 'lines': 0, 'bytes': 0})
+        totals['speeches'] += 1
+        totals['tokens'] += tokens
+        totals['lines'] += lines
+        totals['bytes'] += size
+    speech_tokens = np.array([counts[0] for counts in file_counts], dtype=np.int64)
+    speech_bytes = np.array([counts[2] for counts in file_counts], dtype=np.int64)
+    return sessions, speech_tokens, speech_bytes
+
+
+def size_histogram(sizes):
+    """Count sizes in power-of-two bins; returns [(low, high, count)] with high exclusive, zero sizes in (0, 1)."""
+    if len(sizes) == 0:
+        return []
+    edges = np.concatenate([[0], 2 ** np.arange(int(sizes.max()).bit_length() + 1)])
+    counts, _ = np.histogram(sizes, bins=edges)
+    return [(int(low), int(high), int(count)) for low, high, count in zip(edges[:-1], edges[1:], counts) if count]
+
+
+def save_session_statistics(sessions, output_path):
+    """Write the per-session counts as CSV."""
+    with open(output_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['session', 'year', 'speeches', 'tokens', 'lines', 'bytes'])
+        for (session, year), totals in sorted(sessions.items()):
+            writer.writerow([session, year, totals['speeches'], totals['tokens'], totals['lines'], totals['bytes']])
+
+
+def print_statistics(sessions, speech_tokens, speech_bytes):
+    for (session, year), totals in sorted(sessions.items()):
+        print(f"Session {session:02d} - {year}: {totals['speeches']} speeches, {totals['tokens']:,} tokens, "
+              f"{totals['lines']:,} lines, {totals['bytes']:,} bytes")
+    print(f"Total: {len(speech_tokens)} speeches, {int(speech_tokens.sum()):,} tokens, {int(speech_bytes.sum()):,} bytes")
+    for name, sizes in (('Tokens', speech_tokens), ('Bytes', speech_bytes)):
+        print(f"{name} per speech:")
+        for low, high, count in size_histogram(sizes):
+            print(f"  {low:>9,} - {high - 1:>9,}: {count}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Count speeches, tokens, lines and bytes per session on the raw files.')
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes (default: 1, serial)')
+    args = parser.parse_args()
+
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
+    output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\corpusStatistics.csv'  # Path to save the CSV file
+    start = time.perf_counter()
+    sessions, speech_tokens, speech_bytes = corpus_statistics(folder_path, workers=args.workers)
+    print_statistics(sessions, speech_tokens, speech_bytes)
+    save_session_statistics(sessions, output_path)
+    print(f"Counted {len(speech_tokens)} files in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,122 @@
+import os
+import json
+import numpy as np
+import scipy.sparse as sp
+from corpusEngine import SpeechInputs, iter_session_files
+from corpusReader import ReadAhead
+
+
+class DocumentTermMatrix:
+    """Sparse speech x vocabulary count matrix of lower-cased raw text word tokens, built once and kept on disk.
+
+    Any single-word lexicon rate is then one sparse matrix-vector product over the whole corpus.
+    Multi-word entries cannot be seen in unigram counts and are left out, use
+    lexiconMatcher.LexiconMatcher for phrases.
+    """
+
+    def __init__(self, counts, vocabulary, speeches):
+        self.counts = counts.tocsr()
+        self.vocabulary = vocabulary
+        self.term_ids = {term: term_id for term_id, term in enumerate(vocabulary)}
+        # One (session, year, txt_file) row label per speech
+        self.speeches = speeches
+        self.token_totals = np.asarray(self.counts.sum(axis=1)).ravel()
+        self.years = np.array([year for _, year, _ in speeches], dtype=np.int64)
+
+    @classmethod
+    def build(cls, folder_path, token_cache=None, skip_years=(1948, 1949)):
+        """Tokenize every speech once (or load its tokens from token_cache) and count its terms."""
+        term_ids = {}
+        speeches = []
+        indptr = [0]
+        indices = []
+        data = []
+        current_year = None
+
+        session_files = list(iter_session_files(folder_path, skip_years))
+        reader = ReadAhead([txt_file for _, _, txt_file in session_files])
+        for (session, year, txt_file), (_, text) in zip(session_files, reader):
+            if year != current_year:
+                print(f"Processing year: {year}")
+                current_year = year
+
+            # Like graphYearSwearWordRate: the raw text of every file, an empty one has rate 0
+            speech_counts = {}
+            for word in SpeechInputs(text, token_cache).get('raw_lower_words'):
+                term_id = term_ids.setdefault(word, len(term_ids))
+                speech_counts[term_id] = speech_counts.get(term_id, 0) + 1
+
+            indices.extend(speech_counts.keys())
+            data.extend(speech_counts.values())
+            indptr.append(len(indices))
+            speeches.append((session, year, txt_file))
+
+        reader.report()
+        if token_cache is not None:
+            token_cache.save()
+
+        counts = sp.csr_matrix((np.array(data, dtype=np.int32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+                               shape=(len(speeches), len(term_ids)))
+        return cls(counts, list(term_ids), speeches)
+
+    def save(self, folder_path):
+        os.makedirs(folder_path, exist_ok=True)
+        sp.save_npz(os.path.join(folder_path, 'counts.npz'), self.counts)
+        with open(os.path.join(folder_path, 'vocabulary.json'), 'w', encoding='utf-8') as file:
+            json.dump(self.vocabulary, file, ensure_ascii=False)
+        with open(os.path.join(folder_path, 'speeches.json'), 'w', encoding='utf-8') as file:
+            json.dump(self.speeches, file, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, folder_path):
+        counts = sp.load_npz(os.path.join(folder_path, 'counts.npz'))
+        with open(os.path.join(folder_path, 'vocabulary.json'), 'r', encoding='utf-8') as file:
+            vocabulary = json.load(file)
+        with open(os.path.join(folder_path, 'speeches.json'), 'r', encoding='utf-8') as file:
+            speeches = [tuple(speech) for speech in json.load(file)]
+        return cls(counts, vocabulary, speeches)
+
+    def indicator(self, words):
+        """Return the 0/1 vocabulary vector of a word list; multi-word entries are skipped."""
+        vector = np.zeros(len(self.vocabulary))
+        for word in words:
+            term_id = self.term_ids.get(word.lower())
+            if term_id is not None:
+                vector[term_id] = 1
+        return vector
+
+    def lexicon_rates(self, words):
+        """Return the per-speech rate of a word list as one sparse matrix-vector product."""
+        lexicon_counts = self.counts @ self.indicator(words)
+        return np.divide(lexicon_counts, self.token_totals, out=np.zeros(len(self.speeches)), where=self.token_totals > 0)
+
+    def year_curve(self, speech_values):
+        """Average per-speech values by year, returning (years, yearly means)."""
+        years, year_index = np.unique(self.years, return_inverse=True)
+        sums = np.bincount(year_index, weights=speech_values, minlength=len(years))
+        speech_counts = np.bincount(year_index, minlength=len(years))
+        return years.tolist(), (sums / speech_counts).tolist()
+
+
+if __name__ == '__main__':
+    from lexiconMatcher import load_lexicons
+    from graphYearSwearWordRate import plot_swear_word_rate_timeline, lexicon_plots
+    from tokenCache import TokenCache
+
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
+    matrix_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\documentTermMatrix'  # Folder to keep the matrix in
+    output_folder = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs'  # Folder to save the SVG files
+
+    # Build the matrix once, afterwards every word list is a single product
+    if os.path.exists(os.path.join(matrix_path, 'counts.npz')):
+        dtm = DocumentTermMatrix.load(matrix_path)
+    else:
+        token_cache = TokenCache(r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\tokenCache')  # Folder for cached tokenizations
+        dtm = DocumentTermMatrix.build(folder_path, token_cache)
+        dtm.save(matrix_path)
+
+    for name, words in load_lexicons().items():
+        title, file_name = lexicon_plots[name]
+        years, rates = dtm.year_curve(dtm.lexicon_rates(words))
+        plot_swear_word_rate_timeline(years, rates, os.path.join(output_folder, file_name), title)
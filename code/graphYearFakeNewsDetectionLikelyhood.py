@@ -1,15 +1,16 @@
 import os
-import glob
 import re
+import time
+import argparse
+from types import SimpleNamespace
 import matplotlib.pyplot as plt
 import torch
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
 from nltk.tokenize import sent_tokenize
 import nltk
 import numpy as np
-
-# Ensure you have NLTK's punkt tokenizer data
-nltk.download('punkt')
+from sentenceScoreCache import SentenceScoreCache
+from resourceManager import require_punkt, resolve_model, model_dir, hf_tokenizer, hf_classifier, allow_downloads
+from corpusReader import corpus_glob, open_corpus_text
 
 
 def remove_numbered_labels(text):
@@ -17,37 +18,248 @@ def remove_numbered_labels(text):
     return re.sub(r'\b\d+\.\s+', '', text)
 
 
-# Load the fake news detection model and tokenizer
+# The fake news detection model and tokenizer, loaded from resourceManager.RESOURCE_DIR on first use
 model_name = "mrm8488/bert-tiny-finetuned-fake-news-detection"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForSequenceClassification.from_pretrained(model_name)
-
+# Where export_onnx writes the ONNX model and its tokenizer, and where the 'onnx' backend looks by default
+onnx_model_path = model_dir(f'{model_name}-onnx')
+
+
+class OnnxClassifier:
+    """ONNX Runtime session that can be called like the PyTorch model, returning an object with .logits."""
 
-def calculate_fake_news_likelihood(text):
-    """Estimate the likelihood of fake news in the text using the pre-trained model."""
-    sentences = sent_tokenize(text)
-    probabilities = []
+    def __init__(self, model_path=onnx_model_path):
+        import onnxruntime
 
-    for sentence in sentences:
-        inputs = tokenizer(sentence, return_tensors="pt", truncation=True, padding=True, max_length=512)
-        with torch.no_grad():
-            outputs = model(**inputs)
-        logits = outputs.logits
-        sentence_probabilities = torch.nn.functional.softmax(logits, dim=-1)
-        fake_prob = sentence_probabilities[0][0].item()  # Probability for the 'fake' class
-        probabilities.append(fake_prob)
+        # A hub name refers to its local copy, like for the other backends; named like a Hugging Face
+        # model, so classifier_tokenizer finds the tokenizer saved next to it
+        self.name_or_path = model_path if os.path.isabs(model_path) else resolve_model(model_path)
+        onnx_path = os.path.join(self.name_or_path, 'model.onnx')
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(f"{onnx_path} not found, write it with export_onnx (--export-onnx)")
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = torch.get_num_threads()
+        self.session = onnxruntime.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def __call__(self, **inputs):
+        feed = {name: inputs[name].numpy() for name in self.input_names}
+        logits = self.session.run(['logits'], feed)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
 
-    # Combine probabilities (e.g., by averaging)
-    average_probability = sum(probabilities) / len(probabilities) if probabilities else 0
-    return average_probability
 
+def export_onnx(model_path=model_name, output_path=onnx_model_path):
+    """Export the fp32 model in model_path to output_path/model.onnx for the 'onnx' backend, with its tokenizer."""
+    from transformers import AutoModelForSequenceClassification
 
-def process_folder_by_session(folder_path):
-    """Process each session folder, calculate average fake news likelihood per year."""
+    fp32_model = AutoModelForSequenceClassification.from_pretrained(resolve_model(model_path))
+    fp32_model.eval()
+    os.makedirs(output_path, exist_ok=True)
+    tokenizer = hf_tokenizer(model_path)
+
+    example = tokenizer(["Mr. President, I congratulate you."], return_tensors="pt")
+    # Graph inputs are named positionally, so pass them in the order of the model's forward()
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in example]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['logits'] = {0: 'batch'}
+    torch.onnx.export(fp32_model, tuple(example[name] for name in input_names), os.path.join(output_path, 'model.onnx'),
+                      input_names=input_names, output_names=['logits'], dynamic_axes=dynamic_axes, dynamo=False)
+    tokenizer.save_pretrained(output_path)
+    fp32_model.config.save_pretrained(output_path)
+
+
+def load_classifier(backend='fp32', model_path=None):
+    """Load the classifier for a backend, 'fp32', 'int8' or 'onnx', from a local directory or hub name.
+
+    'int8' dynamically quantizes the linear layers of the fp32 model, 'onnx' expects a
+    model.onnx written by export_onnx (by default in onnx_model_path).
+    """
+    if backend == 'onnx':
+        return OnnxClassifier(model_path or onnx_model_path)
+
+    model_path = model_path or model_name
+
+    classifier = hf_classifier(model_path)
+    if backend == 'int8':
+        classifier = torch.ao.quantization.quantize_dynamic(classifier, {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend != 'fp32':
+        raise ValueError(f"Unknown backend: {backend}")
+    return classifier
+
+
+def sentence_cache_model_id(backend='fp32', model_path=None):
+    """Return the model ID a backend's scores are kept under in a sentenceScoreCache.SentenceScoreCache."""
+    return f'{model_path or model_name}:{backend}'
+
+
+def classifier_tokenizer(classifier=None):
+    """Return the tokenizer stored with a classifier from load_classifier, the fp32 model's by default."""
+    return hf_tokenizer(getattr(classifier, 'name_or_path', model_name))
+
+
+def score_sentences(sentences, batch_size=64, classifier=None):
+    """Return the fake-class probability of every sentence, running the model on padded batches.
+
+    Sentences are sorted by token length so each batch holds sentences of similar length and
+    needs little padding; the probabilities are returned in the original order.
+    Uses the fp32 model unless another classifier from load_classifier is given.
+    """
+    if classifier is None:
+        classifier = hf_classifier(model_name)
+    probabilities = [0.0] * len(sentences)
+    if not sentences:
+        return probabilities
+
+    tokenizer = classifier_tokenizer(classifier)
+    encodings = tokenizer(sentences, truncation=True, max_length=512)
+    order = sorted(range(len(sentences)), key=lambda i: len(encodings['input_ids'][i]))
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            inputs = tokenizer.pad({key: [values[i] for i in batch] for key, values in encodings.items()},
+                                   return_tensors="pt")
+            logits = classifier(**inputs).logits
+            sentence_probabilities = torch.nn.functional.softmax(logits, dim=-1)
+            for i, fake_prob in zip(batch, sentence_probabilities[:, 0].tolist()):  # Probability for the 'fake' class
+                probabilities[i] = fake_prob
+
+    return probabilities
+
+
+class ScoringThroughput:
+    """Sequences scored and the time it took, summed over calls and reported once per run."""
+
+    def __init__(self, unit='sentences'):
+        self.unit = unit
+        self.count = 0
+        self.seconds = 0.0
+
+    def add(self, count, seconds):
+        self.count += count
+        self.seconds += seconds
+
+    def report(self):
+        if self.count and self.seconds > 0:
+            print(f"Scored {self.count} {self.unit} in {self.seconds:.1f}s "
+                  f"({self.count / self.seconds:.0f} {self.unit}/sec)")
+
+
+def calculate_fake_news_likelihoods(texts, batch_size=64, classifier=None, sentence_cache=None, text_sentences=None,
+                                    throughput=None):
+    """Estimate the fake news likelihood of several texts, batching the sentences of all texts together.
+
+    With a sentenceScoreCache.SentenceScoreCache repeated and already scored sentences skip the model.
+    Already split sentences (e.g. from a sentenceSegmentation.Segmentation) can be passed as text_sentences.
+    The scoring time is added to throughput (a ScoringThroughput) if one is given.
+    """
+    if text_sentences is None:
+        # Ensure you have NLTK's punkt tokenizer data (looked up locally, no network access unless allowed)
+        require_punkt()
+        text_sentences = [sent_tokenize(text) for text in texts]
+    all_sentences = [sentence for sentences in text_sentences for sentence in sentences]
+
+    start_time = time.perf_counter()
+    if sentence_cache is not None:
+        all_probabilities = sentence_cache.score(
+            all_sentences, lambda sentences: score_sentences(sentences, batch_size, classifier))
+    else:
+        all_probabilities = score_sentences(all_sentences, batch_size, classifier)
+    if throughput is not None:
+        throughput.add(len(all_sentences), time.perf_counter() - start_time)
+
+    likelihoods = []
+    position = 0
+    for sentences in text_sentences:
+        probabilities = all_probabilities[position:position + len(sentences)]
+        position += len(sentences)
+        # Combine probabilities (e.g., by averaging)
+        average_probability = sum(probabilities) / len(probabilities) if probabilities else 0
+        likelihoods.append(average_probability)
+    return likelihoods
+
+
+def pack_sentence_windows(sentences, max_tokens=512, overlap_sentences=0, classifier=None):
+    """Group consecutive sentences into windows of at most max_tokens subword tokens of the classifier's tokenizer.
+
+    Returns (start, end, token count) per window; the next window repeats the last
+    overlap_sentences sentences of the previous one. A sentence longer than a window gets a
+    window of its own and is truncated by the tokenizer.
+    """
+    budget = max_tokens - 2  # Room for [CLS] and [SEP]
+    tokenizer = classifier_tokenizer(classifier)
+    lengths = [len(tokenizer.tokenize(sentence)) for sentence in sentences]
+    windows = []
+    start = 0
+    while start < len(sentences):
+        end = start
+        total = 0
+        while end < len(sentences) and (end == start or total + lengths[end] <= budget):
+            total += lengths[end]
+            end += 1
+        windows.append((start, end, min(total, budget)))
+        if end == len(sentences):
+            break
+        start = max(end - overlap_sentences, start + 1)
+    return windows
+
+
+def calculate_fake_news_likelihoods_chunked(texts, max_tokens=512, overlap_sentences=0, batch_size=16,
+                                            classifier=None, sentence_cache=None, throughput=None):
+    """Estimate the fake news likelihood of several texts by scoring windows of consecutive sentences.
+
+    Each window is one forward pass; a text's score is the token-weighted mean of its windows.
+    """
+    require_punkt()
+    text_windows = []
+    window_texts = []
+    for text in texts:
+        sentences = sent_tokenize(text)
+        windows = pack_sentence_windows(sentences, max_tokens, overlap_sentences, classifier)
+        text_windows.append([token_count for _, _, token_count in windows])
+        window_texts.extend(' '.join(sentences[start:end]) for start, end, _ in windows)
+
+    start_time = time.perf_counter()
+    if sentence_cache is not None:
+        window_probabilities = sentence_cache.score(
+            window_texts, lambda windows: score_sentences(windows, batch_size, classifier))
+    else:
+        window_probabilities = score_sentences(window_texts, batch_size, classifier)
+    if throughput is not None:
+        throughput.add(len(window_texts), time.perf_counter() - start_time)
+
+    likelihoods = []
+    position = 0
+    for token_counts in text_windows:
+        probabilities = window_probabilities[position:position + len(token_counts)]
+        position += len(token_counts)
+        total_tokens = sum(token_counts)
+        # Combine probabilities weighted by the number of tokens in each window
+        if total_tokens:
+            likelihoods.append(sum(p * n for p, n in zip(probabilities, token_counts)) / total_tokens)
+        else:
+            likelihoods.append(0)
+    return likelihoods
+
+
+def calculate_fake_news_likelihood(text, batch_size=64, sentences=None, classifier=None, sentence_cache=None):
+    """Estimate the likelihood of fake news in the text using the pre-trained model (or classifier)."""
+    return calculate_fake_news_likelihoods([text], batch_size, classifier, sentence_cache,
+                                           text_sentences=[sentences] if sentences is not None else None)[0]
+
+
+def process_folder_by_session(folder_path, batch_size=64, classifier=None, sentence_cache=None, mode='sentence',
+                              max_tokens=512, overlap_sentences=0):
+    """Process each session folder, calculate average fake news likelihood per year.
+
+    The sentences of all speeches of a year are scored together in batches of batch_size. With
+    mode='chunked' windows of consecutive sentences are scored instead, see
+    calculate_fake_news_likelihoods_chunked.
+    """
     yearly_probabilities = {}
     years = []
+    throughput = ScoringThroughput('windows' if mode == 'chunked' else 'sentences')
 
-    session_folders = glob.glob(os.path.join(folder_path, "Session*"))
+    session_folders = corpus_glob(os.path.join(folder_path, "Session*"))
 
     for session_folder in session_folders:
         # Extract year from folder name
@@ -58,13 +270,13 @@ def process_folder_by_session(folder_path):
             # Skip years 1948 and 1949
             if year in [1948, 1949]:
                 continue  # Skip years 1948 and 1949
-            year_probabilities = []
+            year_texts = []
             print(f"Processing year: {year}")
 
             # Process each txt file in the session folder
-            txt_files = glob.glob(os.path.join(session_folder, "*.txt"))
+            txt_files = corpus_glob(os.path.join(session_folder, "*.txt"))
             for txt_file in txt_files:
-                with open(txt_file, 'r', encoding='utf-8') as file:
+                with open_corpus_text(txt_file) as file:
                     content = file.read()
                     # Preprocess the text to remove page/paragraph numbers
                     preprocessed_content = remove_numbered_labels(content)
@@ -72,9 +284,15 @@ def process_folder_by_session(folder_path):
                     if not preprocessed_content.strip():
                         continue  # Skip empty content after preprocessing
 
-                    # Calculate the fake news likelihood for the text
-                    fake_news_likelihood = calculate_fake_news_likelihood(preprocessed_content)
-                    year_probabilities.append(fake_news_likelihood)
+                    year_texts.append(preprocessed_content)
+
+            # Calculate the fake news likelihood for all texts of the year in shared batches
+            if mode == 'chunked':
+                year_probabilities = calculate_fake_news_likelihoods_chunked(
+                    year_texts, max_tokens, overlap_sentences, batch_size, classifier, sentence_cache, throughput)
+            else:
+                year_probabilities = calculate_fake_news_likelihoods(year_texts, batch_size, classifier, sentence_cache,
+                                                                     throughput=throughput)
 
             # Calculate the average fake news likelihood for the year
             if year_probabilities:
@@ -82,11 +300,117 @@ def process_folder_by_session(folder_path):
                 yearly_probabilities[year] = avg_fake_news_likelihood
                 years.append(year)
 
+    throughput.report()
+    if sentence_cache is not None:
+        sentence_cache.report()
     if not years:
         print("No data found. Please check the folder path and structure.")
     return years, [yearly_probabilities[year] for year in years]
 
 
+def backend_parity_report(folder_path, classifier, speeches_per_year=5, batch_size=64, skip_years=(1948, 1949)):
+    """Compare a backend against the fp32 model on a sample of speeches of every year.
+
+    Reports the maximum per-sentence probability deviation and the maximum difference of the
+    per-year curves. skip_years are left out like in the C1 series.
+    """
+    require_punkt()
+    sentence_deviation = 0.0
+    reference_curve = {}
+    candidate_curve = {}
+
+    for session_folder in sorted(corpus_glob(os.path.join(folder_path, "Session*"))):
+        match = re.search(r'Session\s\d{2}\s-\s(\d{4})$', session_folder)
+        if not match:
+            continue
+        year = int(match.group(1))
+        if year in skip_years:
+            continue
+
+        reference_likelihoods = []
+        candidate_likelihoods = []
+        for txt_file in sorted(corpus_glob(os.path.join(session_folder, "*.txt")))[:speeches_per_year]:
+            with open_corpus_text(txt_file) as file:
+                sentences = sent_tokenize(remove_numbered_labels(file.read()))
+            if not sentences:
+                continue
+            reference = score_sentences(sentences, batch_size)
+            candidate = score_sentences(sentences, batch_size, classifier)
+            sentence_deviation = max(sentence_deviation, max(abs(r - c) for r, c in zip(reference, candidate)))
+            reference_likelihoods.append(sum(reference) / len(reference))
+            candidate_likelihoods.append(sum(candidate) / len(candidate))
+
+        if reference_likelihoods:
+            reference_curve[year] = sum(reference_likelihoods) / len(reference_likelihoods)
+            candidate_curve[year] = sum(candidate_likelihoods) / len(candidate_likelihoods)
+
+    curve_difference = max((abs(reference_curve[year] - candidate_curve[year]) for year in reference_curve), default=0.0)
+    print(f"Max per-sentence probability deviation: {sentence_deviation:.6f}")
+    print(f"Max per-year curve difference: {curve_difference:.6f} over {len(reference_curve)} years")
+    return sentence_deviation, curve_difference
+
+
+def scoring_mode_report(folder_path, speeches_per_year=5, max_tokens=512, overlap_sentences=0, batch_size=64,
+                        classifier=None, skip_years=(1948, 1949)):
+    """Compare chunked scoring against per-sentence scoring on a sample of speeches of every year.
+
+    Reports the number of forward passes (sequences) of both modes and how far the per-speech
+    scores and the per-year curves move. skip_years are left out like in the C1 series.
+    """
+    require_punkt()
+    sentence_curve = {}
+    chunked_curve = {}
+    sentence_passes = 0
+    window_passes = 0
+    speech_differences = []
+
+    for session_folder in sorted(corpus_glob(os.path.join(folder_path, "Session*"))):
+        match = re.search(r'Session\s\d{2}\s-\s(\d{4})$', session_folder)
+        if not match:
+            continue
+        year = int(match.group(1))
+        if year in skip_years:
+            continue
+
+        texts = []
+        for txt_file in sorted(corpus_glob(os.path.join(session_folder, "*.txt")))[:speeches_per_year]:
+            with open_corpus_text(txt_file) as file:
+                text = remove_numbered_labels(file.read())
+            if text.strip():
+                texts.append(text)
+        if not texts:
+            continue
+
+        for text in texts:
+            sentences = sent_tokenize(text)
+            sentence_passes += len(sentences)
+            window_passes += len(pack_sentence_windows(sentences, max_tokens, overlap_sentences, classifier))
+
+        sentence_likelihoods = calculate_fake_news_likelihoods(texts, batch_size, classifier)
+        chunked_likelihoods = calculate_fake_news_likelihoods_chunked(texts, max_tokens, overlap_sentences,
+                                                                      batch_size, classifier)
+        speech_differences.extend(abs(s - c) for s, c in zip(sentence_likelihoods, chunked_likelihoods))
+        sentence_curve[year] = sum(sentence_likelihoods) / len(sentence_likelihoods)
+        chunked_curve[year] = sum(chunked_likelihoods) / len(chunked_likelihoods)
+
+    years = sorted(sentence_curve)
+    if not years:
+        print("No data found. Please check the folder path and structure.")
+        return None
+    curve_differences = [abs(sentence_curve[year] - chunked_curve[year]) for year in years]
+    correlation = np.corrcoef([sentence_curve[year] for year in years], [chunked_curve[year] for year in years])[0, 1] \
+        if len(years) > 1 else float('nan')
+
+    print(f"Forward passes: {sentence_passes} sentences vs {window_passes} windows "
+          f"({sentence_passes / max(window_passes, 1):.1f}x fewer)")
+    print(f"Per-speech difference: mean {np.mean(speech_differences):.6f}, max {max(speech_differences):.6f}")
+    print(f"Per-year curve difference: mean {np.mean(curve_differences):.6f}, max {max(curve_differences):.6f}, "
+          f"correlation {correlation:.4f}")
+    return {'sentence_passes': sentence_passes, 'window_passes': window_passes,
+            'max_speech_difference': max(speech_differences), 'max_curve_difference': max(curve_differences),
+            'curve_correlation': correlation}
+
+
 def plot_fake_news_likelihood_timeline(years, average_probabilities, output_path):
     if not years or not average_probabilities:
         print("No data to plot.")
@@ -130,8 +454,44 @@ def plot_fake_news_likelihood_timeline(years, average_probabilities, output_path
     plt.show()
 
 
-# Example usage:
-folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
-output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\c1_fake_news_likelihood_1946_2022.svg'  # Path to save the SVG file
-years, average_probabilities = process_folder_by_session(folder_path)
-plot_fake_news_likelihood_timeline(years, average_probabilities, output_path)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='C1 - Fake news likelihood per year.')
+    parser.add_argument('--batch-size', type=int, default=64, help='sentences per forward pass (default: 64)')
+    parser.add_argument('--threads', type=int, default=None, help='number of torch CPU threads (default: torch default)')
+    parser.add_argument('--backend', choices=['fp32', 'int8', 'onnx'], default='fp32', help='inference backend (default: fp32)')
+    parser.add_argument('--model-path', help='model directory or hub name for the backend '
+                                             '(default: the fp32 model, or the export_onnx directory for onnx)')
+    parser.add_argument('--allow-download', action='store_true', help='download missing NLTK data and models into the resource folder')
+    parser.add_argument('--export-onnx', metavar='DIR', nargs='?', const=onnx_model_path,
+                        help='export the fp32 model to DIR (default: where the onnx backend looks) and exit')
+    parser.add_argument('--parity', action='store_true', help='compare the backend against fp32 on a corpus sample')
+    parser.add_argument('--sentence-cache', metavar='PATH', help='SQLite file caching the score of every unique sentence')
+    parser.add_argument('--mode', choices=['sentence', 'chunked'], default='sentence',
+                        help='score every sentence, or windows of consecutive sentences (default: sentence)')
+    parser.add_argument('--max-tokens', type=int, default=512, help='subword tokens per window in chunked mode (default: 512)')
+    parser.add_argument('--overlap', type=int, default=0, help='sentences shared by consecutive windows (default: 0)')
+    parser.add_argument('--compare-modes', action='store_true', help='compare chunked and per-sentence scores on a corpus sample')
+    args = parser.parse_args()
+    if args.allow_download:
+        allow_downloads()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
+    output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\c1_fake_news_likelihood_1946_2022.svg'  # Path to save the SVG file
+    if args.export_onnx:
+        export_onnx(args.model_path or model_name, args.export_onnx)
+    else:
+        classifier = load_classifier(args.backend, args.model_path)
+        if args.parity:
+            backend_parity_report(folder_path, classifier, batch_size=args.batch_size)
+        if args.compare_modes:
+            scoring_mode_report(folder_path, max_tokens=args.max_tokens, overlap_sentences=args.overlap,
+                                batch_size=args.batch_size, classifier=classifier)
+        sentence_cache = None
+        if args.sentence_cache:
+            sentence_cache = SentenceScoreCache(args.sentence_cache, sentence_cache_model_id(args.backend, args.model_path))
+        years, average_probabilities = process_folder_by_session(folder_path, args.batch_size, classifier, sentence_cache,
+                                                                 args.mode, args.max_tokens, args.overlap)
+        plot_fake_news_likelihood_timeline(years, average_probabilities, output_path)
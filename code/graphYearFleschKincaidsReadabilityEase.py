@@ -1,22 +1,21 @@
 import os
-import glob
 import re
+import functools
 import nltk
 import matplotlib.pyplot as plt
 import numpy as np
-from nltk.corpus import cmudict
 from nltk.tokenize import sent_tokenize, word_tokenize
-
-# Ensure you have NLTK's punkt tokenizer data and CMU Pronouncing Dictionary
-nltk.download('punkt')
-nltk.download('cmudict')
-
-# Load the CMU Pronouncing Dictionary
-d = cmudict.dict()
+from tokenCache import TokenCache
+from syllableTable import syllable_table
+from resourceManager import require_punkt, cmu_dictionary
+from corpusReader import corpus_glob, open_corpus_text
 
 
+@functools.lru_cache(maxsize=None)
 def syllable_count(word):
-    """Return the number of syllables in a word using CMU Pronouncing Dictionary."""
+    """Return the number of syllables in a word using CMU Pronouncing Dictionary, memoized per word."""
+    # The dictionary is loaded the first time a syllable is counted
+    d = cmu_dictionary()
     word = word.lower()
     if word in d:
         return max([len(list(y for y in x if y[-1].isdigit())) for x in d[word]])
@@ -37,14 +36,22 @@ def preprocess_text(text):
     return '\n'.join(processed_lines)
 
 
-def calculate_flesch_kincaid(text):
+def calculate_flesch_kincaid(text, sentences=None, words=None, syllables=None):
     """Calculate the Flesch-Kincaid Readability Ease (FKRE) for the given text."""
-    sentences = sent_tokenize(text)
-    words = word_tokenize(text)
+    # Already tokenized sentences, words (or their token IDs) and per-word syllable counts can be passed in
+    if sentences is None or words is None:
+    # Ensure you have NLTK's punkt tokenizer data (looked up locally, no network access unless allowed)
+        require_punkt()
+    if sentences is None:
+        sentences = sent_tokenize(text)
+    if words is None:
+        words = word_tokenize(text)
+    if syllables is None:
+        syllables = [syllable_count(word) for word in words]
 
     num_sentences = len(sentences)
     num_words = len(words)
-    num_syllables = sum(syllable_count(word) for word in words)
+    num_syllables = int(np.sum(syllables))
 
     if num_sentences == 0 or num_words == 0:
         return 0
@@ -54,12 +61,12 @@ def calculate_flesch_kincaid(text):
     return fk_re
 
 
-def process_folder_by_session(folder_path):
-    """Process each session folder, calculate average Flesch-Kincaid Readability Ease per year."""
+def process_folder_by_session(folder_path, token_cache=None):
+    """Process each session folder, calculate average Flesch-Kincaid Readability Ease per year (tokens from token_cache if given)."""
     fk_re_values = []
     years = []
 
-    session_folders = glob.glob(os.path.join(folder_path, "Session*"))
+    session_folders = corpus_glob(os.path.join(folder_path, "Session*"))
 
     for session_folder in session_folders:
         # Extract year from folder name
@@ -74,9 +81,9 @@ def process_folder_by_session(folder_path):
             print(f"Processing year: {year}")
 
             # Process each txt file in the session folder
-            txt_files = glob.glob(os.path.join(session_folder, "*.txt"))
+            txt_files = corpus_glob(os.path.join(session_folder, "*.txt"))
             for txt_file in txt_files:
-                with open(txt_file, 'r', encoding='utf-8') as file:
+                with open_corpus_text(txt_file) as file:
                     content = file.read()
                     # Preprocess the text to remove page/paragraph numbers
                     preprocessed_content = preprocess_text(content)
@@ -85,7 +92,13 @@ def process_folder_by_session(folder_path):
                         continue  # Skip empty content after preprocessing
 
                     # Calculate the Flesch-Kincaid Readability Ease for the text
-                    fk_re = calculate_flesch_kincaid(preprocessed_content)
+                    if token_cache:
+                        # Syllables are gathered from the per-token-type table by token ID
+                        word_ids = token_cache.word_token_ids(preprocessed_content)
+                        fk_re = calculate_flesch_kincaid(preprocessed_content, words=word_ids,
+                                                         syllables=syllable_table(token_cache).gather(word_ids))
+                    else:
+                        fk_re = calculate_flesch_kincaid(preprocessed_content)
                     year_fk_re_values.append(fk_re)
 
             # Calculate the average FKRE for the year
@@ -96,12 +109,16 @@ def process_folder_by_session(folder_path):
             else:
                 print(f"No valid text files found for year: {year}")
 
+    if token_cache is not None:
+        token_cache.save()
+        syllable_table(token_cache).save()
+        token_cache.report()
     if not years:
         print("No data found. Please check the folder path and structure.")
     return years, fk_re_values
 
 
-def plot_fk_re_timeline(years, fk_re_values, output_path):
+def plot_fk_re_timeline(years, fk_re_values, output_path, title='S3 - Flesch-Kincaid Readability Ease from 1946 to 2022', band=None):
     if not years or not fk_re_values:
         print("No data to plot.")
         return
@@ -109,6 +126,9 @@ def plot_fk_re_timeline(years, fk_re_values, output_path):
     fig, ax = plt.subplots(figsize=(10, 3))
     ax.plot(years, fk_re_values, marker='o', label='Flesch-Kincaid Readability Ease')
 
+    if band is not None:
+        ax.fill_between(years, band[0], band[1], alpha=0.2, label='95% Confidence Interval')
+
     # Polynomial regression (e.g., a degree 5 polynomial)
     polynomial_degree = 5
     coefficients = np.polyfit(years, fk_re_values, polynomial_degree)
@@ -122,7 +142,7 @@ def plot_fk_re_timeline(years, fk_re_values, output_path):
     ax.plot(x_values, y_values, color='red')
 
     # Set title with padding
-    ax.set_title('S3 - Flesch-Kincaid Readability Ease from 1946 to 2022', pad=20)
+    ax.set_title(title, pad=20)
 
     ax.grid(True)
 
@@ -144,8 +164,10 @@ def plot_fk_re_timeline(years, fk_re_values, output_path):
     plt.show()
 
 
-# Example usage:
-folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
-output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\s3_flesch_kincaid_readability_1946_2022.svg'  # Path to save the SVG file
-years, fk_re_values = process_folder_by_session(folder_path)
-plot_fk_re_timeline(years, fk_re_values, output_path)
+if __name__ == '__main__':
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
+    output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\s3_flesch_kincaid_readability_1946_2022.svg'  # Path to save the SVG file
+    token_cache = TokenCache(r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\tokenCache')  # Folder for cached tokenizations
+    years, fk_re_values = process_folder_by_session(folder_path, token_cache)
+    plot_fk_re_timeline(years, fk_re_values, output_path)
@@ -1,18 +1,22 @@
 import os
-import glob
 import re
 import nltk
 import matplotlib.pyplot as plt
+from resourceManager import require_punkt
+from corpusReader import corpus_glob, open_corpus_text
+from streamingTokenizer import iter_text_chunks, iter_word_tokens
 
-# Ensure you have NLTK's punkt tokenizer data
-nltk.download('punkt')
-
-def calculate_first_person_singular_rate(text):
-    """Calculate the rate of first-person singular pronouns in the text."""
-    first_person_singular = {"i", "me", "my", "mine", "myself"}
+first_person_singular = {"i", "me", "my", "mine", "myself"}
 
+def calculate_first_person_singular_rate(text, token_cache=None):
+    """Calculate the rate of first-person singular pronouns in the text (tokens from token_cache if given)."""
     # Tokenize the text into words
-    words = nltk.word_tokenize(text.lower())
+    if token_cache:
+        words = token_cache.word_tokenize(text.lower())
+    else:
+        # Ensure you have NLTK's punkt tokenizer data (looked up locally, no network access unless allowed)
+        require_punkt()
+        words = nltk.word_tokenize(text.lower())
     total_words = len(words)
     first_person_singular_count = sum(1 for word in words if word in first_person_singular)
 
@@ -21,23 +25,44 @@ def calculate_first_person_singular_rate(text):
         return 0
     return first_person_singular_count / total_words
 
-def process_folder(folder_path):
+def stream_first_person_singular_rate(txt_file, chunk_size=1 << 20):
+    """calculate_first_person_singular_rate of a file read and tokenized in chunks, without holding its tokens."""
+    total_words = 0
+    first_person_singular_count = 0
+    for word in iter_word_tokens(iter_text_chunks(txt_file, chunk_size), lower=True):
+        total_words += 1
+        if word in first_person_singular:
+            first_person_singular_count += 1
+
+    if total_words == 0:
+        return 0
+    return first_person_singular_count / total_words
+
+def process_folder(folder_path, token_cache=None, streaming=False):
+    """Calculate the first-person singular rate of every year file; streaming=True reads the files in chunks (without token_cache)."""
     first_person_singular_rates = []
     years = []
 
-    txt_files = glob.glob(os.path.join(folder_path, "*.txt"))
+    txt_files = corpus_glob(os.path.join(folder_path, "*.txt"))
 
     for txt_file in txt_files:
         # Extract year from filename
         match = re.search(r'(\d{4})\.txt$', txt_file)
         if match:
             year = int(match.group(1))
-            with open(txt_file, 'r', encoding='utf-8') as file:
+            if streaming:
+                first_person_singular_rates.append(stream_first_person_singular_rate(txt_file))
+                years.append(year)
+                continue
+            with open_corpus_text(txt_file) as file:
                 content = file.read()
-                first_person_singular_rate = calculate_first_person_singular_rate(content)
+                first_person_singular_rate = calculate_first_person_singular_rate(content, token_cache)
                 first_person_singular_rates.append(first_person_singular_rate)
                 years.append(year)
 
+    if token_cache is not None:
+        token_cache.save()
+        token_cache.report()
     return years, first_person_singular_rates
 
 def plot_first_person_singular_rate_timeline(years, first_person_singular_rates, output_path):
@@ -63,8 +88,10 @@ def plot_first_person_singular_rate_timeline(years, first_person_singular_rates,
     plt.savefig(output_path, format='svg')
     plt.show()
 
-# Example usage:
-folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\mergedTxtByYears'  # Path to your folder
-output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\mergedTxtByYears\first_person_singular_rate_1946_2022.svg'  # Path to save the SVG file
-years, first_person_singular_rates = process_folder(folder_path)
-plot_first_person_singular_rate_timeline(years, first_person_singular_rates, output_path)
+if __name__ == '__main__':
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\mergedTxtByYears'  # Path to your folder
+    output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\mergedTxtByYears\first_person_singular_rate_1946_2022.svg'  # Path to save the SVG file
+    # The year files are read and tokenized in chunks, never whole
+    years, first_person_singular_rates = process_folder(folder_path, streaming=True)
+    plot_first_person_singular_rate_timeline(years, first_person_singular_rates, output_path)
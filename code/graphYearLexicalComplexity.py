@@ -1,7 +1,9 @@
 import os
-import glob
 import re
 import matplotlib.pyplot as plt
+from slidingMattr import moving_ttr_curve, MovingTTRAccumulator
+from corpusReader import corpus_glob, open_corpus_text
+from streamingTokenizer import iter_text_chunks, iter_whitespace_tokens
 
 
 def remove_numbered_labels(text):
@@ -21,28 +23,37 @@ def get_lexical_diversity(text, window_size=100):
     if len(words) < window_size:
         window_size = len(words)
 
-    ttr_list = []
-    for i in range(len(words) - window_size + 1):
-        window = words[i:i + window_size]
-        ttr = len(set(window)) / len(window)
-        ttr_list.append(ttr)
+    # TTR of every window, updated incrementally as tokens enter and leave the window
+    ttr_list = moving_ttr_curve(words, window_size).tolist()
 
     lexical_diversity = sum(ttr_list) / len(ttr_list)
     return lexical_diversity
 
 
-def process_folder(folder_path):
+def stream_lexical_diversity(txt_file, window_size=100, chunk_size=1 << 20):
+    """get_lexical_diversity(clean_text(content)) of a file read in chunks, in memory bounded by the window."""
+    accumulator = MovingTTRAccumulator(window_size)
+    accumulator.update(iter_whitespace_tokens(iter_text_chunks(txt_file, chunk_size), clean=remove_numbered_labels))
+    return accumulator.mean()
+
+
+def process_folder(folder_path, streaming=False):
+    """Calculate the MATTR of every year file; streaming=True reads the files in chunks instead of whole."""
     lexical_diversities = []
     years = []
 
-    txt_files = glob.glob(os.path.join(folder_path, "*.txt"))
+    txt_files = corpus_glob(os.path.join(folder_path, "*.txt"))
 
     for txt_file in txt_files:
         # Extract year from filename
         match = re.search(r'(\d{4})\.txt$', txt_file)
         if match:
             year = int(match.group(1))
-            with open(txt_file, 'r', encoding='utf-8') as file:
+            if streaming:
+                lexical_diversities.append(stream_lexical_diversity(txt_file))
+                years.append(year)
+                continue
+            with open_corpus_text(txt_file) as file:
                 content = file.read()
                 cleaned_content = clean_text(content)
                 lexical_diversity = get_lexical_diversity(cleaned_content)
@@ -77,8 +88,9 @@ def plot_lexical_diversity_timeline(years, lexical_diversities, output_path):
     plt.show()
 
 
-# Example usage:
-folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\mergedTxtByYears'  # Path to your folder
-output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\lexical_diversity_1946_2022.svg'  # Path to save the SVG file
-years, lexical_diversities = process_folder(folder_path)
-plot_lexical_diversity_timeline(years, lexical_diversities, output_path)
+if __name__ == '__main__':
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\mergedTxtByYears'  # Path to your folder
+    output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\lexical_diversity_1946_2022.svg'  # Path to save the SVG file
+    years, lexical_diversities = process_folder(folder_path, streaming=True)
+    plot_lexical_diversity_timeline(years, lexical_diversities, output_path)
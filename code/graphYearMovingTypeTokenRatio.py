@@ -1,13 +1,14 @@
 import os
-import glob
+import csv
 import re
 import nltk
 import matplotlib.pyplot as plt
 import numpy as np
 from collections import Counter
-
-# Ensure you have NLTK's punkt tokenizer data
-nltk.download('punkt')
+from tokenCache import TokenCache
+from slidingMattr import moving_ttr_curve
+from resourceManager import require_punkt
+from corpusReader import corpus_glob, open_corpus_text
 
 
 def preprocess_text(text):
@@ -29,29 +30,27 @@ def preprocess_text(text):
     return '\n'.join(processed_lines)
 
 
-def calculate_moving_ttr(text, window_size=500):
-    """Calculate the average moving type-token ratio (TTR) for the given text."""
-    words = nltk.word_tokenize(text.lower())
+def calculate_moving_ttr(text, window_size=500, words=None):
+    """Calculate the average moving type-token ratio (TTR) for the given text (or lower-cased word tokens)."""
+    if words is None:
+        # Ensure you have NLTK's punkt tokenizer data (looked up locally, no network access unless allowed)
+        require_punkt()
+        words = nltk.word_tokenize(text.lower())
     if len(words) < window_size:
         return 0
 
-    ttr_values = []
-
-    for i in range(len(words) - window_size + 1):
-        window = words[i:i + window_size]
-        unique_types = len(set(window))
-        ttr = unique_types / len(window)
-        ttr_values.append(ttr)
+    # TTR of every window, updated incrementally as tokens enter and leave the window
+    ttr_values = moving_ttr_curve(words, window_size)
 
-    return np.mean(ttr_values) if ttr_values else 0
+    return np.mean(ttr_values) if len(ttr_values) else 0
 
 
-def process_folder_by_session(folder_path):
-    """Process each session folder, calculate average moving TTR per year."""
+def process_folder_by_session(folder_path, token_cache=None):
+    """Process each session folder, calculate average moving TTR per year (tokens from token_cache if given)."""
     average_ttr_values = []
     years = []
 
-    session_folders = glob.glob(os.path.join(folder_path, "Session*"))
+    session_folders = corpus_glob(os.path.join(folder_path, "Session*"))
 
     for session_folder in session_folders:
         # Extract year from folder name
@@ -68,9 +67,9 @@ def process_folder_by_session(folder_path):
             print(f"Processing year: {year}")
 
             # Process each txt file in the session folder
-            txt_files = glob.glob(os.path.join(session_folder, "*.txt"))
+            txt_files = corpus_glob(os.path.join(session_folder, "*.txt"))
             for txt_file in txt_files:
-                with open(txt_file, 'r', encoding='utf-8') as file:
+                with open_corpus_text(txt_file) as file:
                     content = file.read()
                     # Preprocess the text to remove page/paragraph numbers
                     preprocessed_content = preprocess_text(content)
@@ -79,7 +78,8 @@ def process_folder_by_session(folder_path):
                         continue  # Skip empty content after preprocessing
 
                     # Calculate the moving TTR for the text
-                    moving_ttr = calculate_moving_ttr(preprocessed_content)
+                    words = token_cache.word_tokenize(preprocessed_content.lower()) if token_cache else None
+                    moving_ttr = calculate_moving_ttr(preprocessed_content, words=words)
                     year_ttr_values.append(moving_ttr)
 
             # Calculate the average moving TTR for the year
@@ -90,12 +90,68 @@ def process_folder_by_session(folder_path):
             else:
                 print(f"No valid text files found for year: {year}")
 
+    if token_cache is not None:
+        token_cache.save()
+        token_cache.report()
     if not years:
         print("No data found. Please check the folder path and structure.")
     return years, average_ttr_values
 
 
-def plot_ttr_timeline(years, average_ttr_values, output_path):
+def process_folder_by_session_window_sweep(folder_path, window_sizes=(50, 100, 250, 500, 1000), token_cache=None, workers=1):
+    """Calculate average moving TTR per year for several window sizes in a single corpus pass.
+
+    The engine tokenizes and skips speeches like process_folder_by_session, so the window size 500
+    column is the S2 curve. Returns years and a year x window-size matrix.
+    """
+    # Imported here, the engine imports this script for its MATTR plugin
+    from corpusEngine import run_metrics, MovingTTRMetric
+
+    metrics = [MovingTTRMetric(window_size) for window_size in window_sizes]
+    results = run_metrics(folder_path, metrics, token_cache=token_cache, workers=workers)
+
+    years = results.get(metrics[0].name, ([], []))[0]
+    ttr_matrix = np.column_stack([results[metric.name][1] for metric in metrics]) if years else np.empty((0, len(metrics)))
+    return years, ttr_matrix
+
+
+def save_ttr_window_sweep(years, window_sizes, ttr_matrix, output_path):
+    """Write the year x window-size MATTR matrix as CSV."""
+    with open(output_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['year'] + [f'window_size_{window_size}' for window_size in window_sizes])
+        for year, row in zip(years, ttr_matrix):
+            writer.writerow([year] + list(row))
+
+
+def plot_ttr_window_sweep(years, window_sizes, ttr_matrix, output_path):
+    if not years:
+        print("No data to plot.")
+        return
+
+    fig, axes = plt.subplots(len(window_sizes), 1, figsize=(10, 3 * len(window_sizes)), sharex=True, squeeze=False)
+    tick_positions = list(range(1950, max(years) + 1, 5))
+
+    for ax, window_size, ttr_values in zip(axes[:, 0], window_sizes, ttr_matrix.T):
+        ax.plot(years, ttr_values, marker='o', label='Average Moving TTR')
+        ax.set_title(f'S2 - Lexical Diversity (MATTR, window size {window_size}) from 1946 to 2022', pad=20)
+
+        # Set ticks and grid lines for every fifth year
+        ax.set_xticks(tick_positions)
+        ax.set_xticks(tick_positions, minor=True)
+        ax.tick_params(axis='x', labelrotation=45, labelbottom=True)
+        ax.grid(which='major', linestyle='-', linewidth='0.5', color='black')
+        ax.grid(which='minor', linestyle=':', linewidth='0.5', color='gray')
+
+        # Ensure the y-axis does not use scientific notation
+        ax.get_yaxis().get_major_formatter().set_scientific(False)
+
+    plt.tight_layout()
+    plt.savefig(output_path, format='svg')
+    plt.show()
+
+
+def plot_ttr_timeline(years, average_ttr_values, output_path, band=None):
     if not years or not average_ttr_values:
         print("No data to plot.")
         return
@@ -103,6 +159,9 @@ def plot_ttr_timeline(years, average_ttr_values, output_path):
     fig, ax = plt.subplots(figsize=(10, 3))
     ax.plot(years, average_ttr_values, marker='o', label='Average Moving TTR')
 
+    if band is not None:
+        ax.fill_between(years, band[0], band[1], alpha=0.2, label='95% Confidence Interval')
+
     # Polynomial regression (e.g., a degree 5 polynomial)
     polynomial_degree = 5
     coefficients = np.polyfit(years, average_ttr_values, polynomial_degree)
@@ -138,8 +197,23 @@ def plot_ttr_timeline(years, average_ttr_values, output_path):
     plt.show()
 
 
-# Example usage:
-folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
-output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\window_size_500_s2_average_moving_ttr_1946_2022.svg'  # Path to save the SVG file
-years, average_ttr_values = process_folder_by_session(folder_path)
-plot_ttr_timeline(years, average_ttr_values, output_path)
+if __name__ == '__main__':
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
+    output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\window_size_500_s2_average_moving_ttr_1946_2022.svg'  # Path to save the SVG file
+    token_cache = TokenCache(r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\tokenCache')  # Folder for cached tokenizations
+    years, average_ttr_values = process_folder_by_session(folder_path, token_cache)
+    plot_ttr_timeline(years, average_ttr_values, output_path)
+
+    # Window size sensitivity: all window sizes from one pass over the corpus
+    window_sizes = [50, 100, 250, 500, 1000]
+    sweep_csv_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\s2_moving_ttr_window_sweep_1946_2022.csv'
+    sweep_output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\s2_moving_ttr_window_sweep_1946_2022.svg'
+    sweep_years, ttr_matrix = process_folder_by_session_window_sweep(folder_path, window_sizes, token_cache)
+    # The window size 500 column has to be the S2 curve above
+    s2_values = dict(zip(years, average_ttr_values))
+    sweep_values = ttr_matrix[:, window_sizes.index(500)]
+    if sorted(s2_values) != sweep_years or not np.allclose(sweep_values, [s2_values[year] for year in sweep_years], rtol=1e-9, atol=0):
+        raise AssertionError("The window size 500 column of the sweep differs from the S2 curve")
+    save_ttr_window_sweep(sweep_years, window_sizes, ttr_matrix, sweep_csv_path)
+    plot_ttr_window_sweep(sweep_years, window_sizes, ttr_matrix, sweep_output_path)
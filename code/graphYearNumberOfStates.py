@@ -1,11 +1,12 @@
 import os
 import re
 import matplotlib.pyplot as plt
+from corpusReader import corpus_listdir, corpus_isdir, open_corpus_text
 
 
 def count_txt_files_in_session(session_path):
     """Count the number of .txt files in a given session folder."""
-    txt_files = [f for f in os.listdir(session_path) if f.endswith('.txt')]
+    txt_files = [f for f in corpus_listdir(session_path) if f.endswith('.txt')]
     return len(txt_files)
 
 
@@ -14,14 +15,14 @@ def process_all_sessions(base_path):
     years = []
     state_counts = []
 
-    for session_folder in sorted(os.listdir(base_path)):
+    for session_folder in sorted(corpus_listdir(base_path)):
         match = re.match(r'Session (\d{2}) - (\d{4})', session_folder)
         if match:
             session_number = int(match.group(1))
             year = int(match.group(2))
             session_path = os.path.join(base_path, session_folder)
 
-            if os.path.isdir(session_path):
+            if corpus_isdir(session_path):
                 num_states = count_txt_files_in_session(session_path)
                 years.append(year)
                 state_counts.append(num_states)
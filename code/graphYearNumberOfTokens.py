@@ -1,13 +1,14 @@
 import os
 import re
 import matplotlib.pyplot as plt
+from corpusReader import corpus_listdir, corpus_isdir, open_corpus_text
 
 def count_tokens_in_session(session_path):
     """Count the number of tokens in all .txt files in a given session folder."""
     total_tokens = 0
-    for txt_file in os.listdir(session_path):
+    for txt_file in corpus_listdir(session_path):
         if txt_file.endswith('.txt'):
-            with open(os.path.join(session_path, txt_file), 'r', encoding='utf-8') as file:
+            with open_corpus_text(os.path.join(session_path, txt_file)) as file:
                 content = file.read()
                 tokens = content.split()
                 total_tokens += len(tokens)
@@ -18,14 +19,14 @@ def process_all_sessions(base_path):
     years = []
     token_counts = []
 
-    for session_folder in sorted(os.listdir(base_path)):
+    for session_folder in sorted(corpus_listdir(base_path)):
         match = re.match(r'Session (\d{2}) - (\d{4})', session_folder)
         if match:
             session_number = int(match.group(1))
             year = int(match.group(2))
             session_path = os.path.join(base_path, session_folder)
 
-            if os.path.isdir(session_path):
+            if corpus_isdir(session_path):
                 num_tokens = count_tokens_in_session(session_path)
                 years.append(year)
                 token_counts.append(num_tokens)
@@ -1,12 +1,11 @@
 import os
-import glob
 import re
 import nltk
 import matplotlib.pyplot as plt
 import numpy as np
-
-# Ensure you have NLTK's punkt tokenizer data
-nltk.download('punkt')
+from tokenCache import TokenCache
+from resourceManager import require_punkt
+from corpusReader import corpus_glob, open_corpus_text
 
 
 def preprocess_text(text):
@@ -47,12 +46,16 @@ def extract_numbers(text):
     return meaningful_numbers
 
 
-def process_folder_by_session(folder_path):
-    """Process each session folder, calculate average number density per year."""
+def process_folder_by_session(folder_path, token_cache=None):
+    """Process each session folder, calculate average number density per year (tokens from token_cache if given)."""
+    if not token_cache:
+        # Ensure you have NLTK's punkt tokenizer data (looked up locally, no network access unless allowed)
+        require_punkt()
+    word_tokenize = token_cache.word_tokenize if token_cache else nltk.word_tokenize
     number_densities = []
     years = []
 
-    session_folders = glob.glob(os.path.join(folder_path, "Session*"))
+    session_folders = corpus_glob(os.path.join(folder_path, "Session*"))
 
     for session_folder in session_folders:
         # Extract year from folder name
@@ -68,9 +71,9 @@ def process_folder_by_session(folder_path):
             print(f"Processing year: {year}")
 
             # Process each txt file in the session folder
-            txt_files = glob.glob(os.path.join(session_folder, "*.txt"))
+            txt_files = corpus_glob(os.path.join(session_folder, "*.txt"))
             for txt_file in txt_files:
-                with open(txt_file, 'r', encoding='utf-8') as file:
+                with open_corpus_text(txt_file) as file:
                     content = file.read()
                     # Preprocess the text to remove page/paragraph numbers
                     preprocessed_content = preprocess_text(content)
@@ -81,7 +84,7 @@ def process_folder_by_session(folder_path):
                     # Extract numbers from the preprocessed content
                     numbers = extract_numbers(preprocessed_content)
                     # Avoid division by zero
-                    total_words = len(nltk.word_tokenize(preprocessed_content))
+                    total_words = len(word_tokenize(preprocessed_content))
                     if total_words == 0:
                         continue
 
@@ -96,12 +99,15 @@ def process_folder_by_session(folder_path):
             else:
                 print(f"No valid text files found for year: {year}")
 
+    if token_cache is not None:
+        token_cache.save()
+        token_cache.report()
     if not years:
         print("No data found. Please check the folder path and structure.")
     return years, number_densities
 
 
-def plot_number_density_timeline(years, number_densities, output_path):
+def plot_number_density_timeline(years, number_densities, output_path, band=None):
     if not years or not number_densities:
         print("No data to plot.")
         return
@@ -109,6 +115,9 @@ def plot_number_density_timeline(years, number_densities, output_path):
     fig, ax = plt.subplots(figsize=(10, 3))
     ax.plot(years, number_densities, marker='o', label='Number Density')
 
+    if band is not None:
+        ax.fill_between(years, band[0], band[1], alpha=0.2, label='95% Confidence Interval')
+
     # Polynomial regression (e.g., a degree 5 polynomial)
     polynomial_degree = 5
     coefficients = np.polyfit(years, number_densities, polynomial_degree)
@@ -144,8 +153,10 @@ def plot_number_density_timeline(years, number_densities, output_path):
     plt.show()
 
 
-# Example usage:
-folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
-output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\t3_number_density_1946_2022.svg'  # Path to save the SVG file
-years, number_densities = process_folder_by_session(folder_path)
-plot_number_density_timeline(years, number_densities, output_path)
+if __name__ == '__main__':
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
+    output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\t3_number_density_1946_2022.svg'  # Path to save the SVG file
+    token_cache = TokenCache(r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\tokenCache')  # Folder for cached tokenizations
+    years, number_densities = process_folder_by_session(folder_path, token_cache)
+    plot_number_density_timeline(years, number_densities, output_path)
@@ -1,12 +1,10 @@
 import os
-import glob
 import re
-import nltk
 import matplotlib.pyplot as plt
 import numpy as np
-
-# Ensure you have NLTK's punkt tokenizer data
-nltk.download('punkt')
+from tokenCache import TokenCache
+from sentenceSegmentation import segment_text, word_tokenize_sentence_lengths
+from corpusReader import corpus_glob, open_corpus_text
 
 
 def preprocess_text(text):
@@ -28,12 +26,12 @@ def preprocess_text(text):
     return '\n'.join(processed_lines)
 
 
-def process_folder_by_session(folder_path):
-    """Process each session folder, calculate average sentence length per year."""
+def process_folder_by_session(folder_path, token_cache=None):
+    """Process each session folder, calculate average sentence length per year (tokens from token_cache if given)."""
     average_sentence_lengths = []
     years = []
 
-    session_folders = glob.glob(os.path.join(folder_path, "Session*"))
+    session_folders = corpus_glob(os.path.join(folder_path, "Session*"))
 
     for session_folder in session_folders:
         # Extract year from folder name
@@ -48,9 +46,9 @@ def process_folder_by_session(folder_path):
             print(f"Processing year: {year}")
 
             # Process each txt file in the session folder
-            txt_files = glob.glob(os.path.join(session_folder, "*.txt"))
+            txt_files = corpus_glob(os.path.join(session_folder, "*.txt"))
             for txt_file in txt_files:
-                with open(txt_file, 'r', encoding='utf-8') as file:
+                with open_corpus_text(txt_file) as file:
                     content = file.read()
                     # Preprocess the text to remove page/paragraph numbers
                     preprocessed_content = preprocess_text(content)
@@ -58,14 +56,17 @@ def process_folder_by_session(folder_path):
                     if not preprocessed_content.strip():
                         continue  # Skip empty content after preprocessing
 
-                    # Tokenize sentences and words
-                    sentences = nltk.sent_tokenize(preprocessed_content)
-                    if not sentences:
+                    # Split sentences and words in one pass; sentence lengths are the gaps between the offsets,
+                    # redone with word_tokenize where Punkt could split a lone sentence again
+                    if token_cache:
+                        segmentation = token_cache.segment(preprocessed_content)
+                    else:
+                        segmentation = segment_text(preprocessed_content)
+                    sentence_lengths = word_tokenize_sentence_lengths(preprocessed_content, segmentation)
+                    if len(sentence_lengths) == 0:
                         continue  # Skip if no sentences found
 
-                    # Calculate sentence lengths
-                    sentence_lengths = [len(nltk.word_tokenize(sentence)) for sentence in sentences]
-                    average_sentence_length = sum(sentence_lengths) / len(sentence_lengths)
+                    average_sentence_length = float(sentence_lengths.mean())
                     year_sentence_lengths.append(average_sentence_length)
 
             # Calculate the average sentence length for the year
@@ -76,6 +77,9 @@ def process_folder_by_session(folder_path):
             else:
                 print(f"No valid text files found for year: {year}")
 
+    if token_cache is not None:
+        token_cache.save()
+        token_cache.report()
     if not years:
         print("No data found. Please check the folder path and structure.")
     return years, average_sentence_lengths
@@ -124,8 +128,52 @@ def plot_sentence_length_timeline(years, average_sentence_lengths, output_path):
     plt.show()
 
 
+def process_folder_sentence_length_distribution(folder_path, token_cache=None, workers=1):
+    """Per-year averages of every per-speech sentence length statistic, see corpusEngine.SentenceLengthMetric."""
+    from corpusEngine import SentenceLengthMetric, run_metrics
+    return run_metrics(folder_path, [SentenceLengthMetric()], token_cache=token_cache, workers=workers)
+
+
+def plot_sentence_length_distribution(results, output_path):
+    """Plot the median sentence length with the 25-75 and 10-90 percentile bands."""
+    if 'sentence_length_median' not in results:
+        print("No data to plot.")
+        return
+
+    years, medians = results['sentence_length_median']
+    fig, ax = plt.subplots(figsize=(10, 3))
+    ax.fill_between(years, results['sentence_length_p10'][1], results['sentence_length_p90'][1], color='tab:blue',
+                    alpha=0.15, label='10th-90th percentile')
+    ax.fill_between(years, results['sentence_length_p25'][1], results['sentence_length_p75'][1], color='tab:blue',
+                    alpha=0.3, label='25th-75th percentile')
+    ax.plot(years, medians, marker='o', label='Median Sentence Length')
+
+    # Set title with padding
+    ax.set_title('S1 - Sentence Length Distribution from 1946 to 2022', pad=20)
+    ax.legend(loc='upper right')
+
+    ax.grid(True)
+
+    # Set ticks for every fifth year
+    tick_positions = list(range(1950, max(years) + 1, 5))
+    plt.xticks(tick_positions, rotation=45)
+
+    # Adding grid lines for every fifth year
+    plt.gca().set_xticks(tick_positions, minor=True)
+    plt.grid(which='both')
+    plt.grid(which='major', linestyle='-', linewidth='0.5', color='black')
+    plt.grid(which='minor', linestyle=':', linewidth='0.5', color='gray')
+
+    plt.tight_layout()
+    plt.savefig(output_path, format='svg')
+    plt.show()
+
+
 # Example usage:
 folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
 output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\s1_average_sentence_length_1946_2022.svg'  # Path to save the SVG file
-years, average_sentence_lengths = process_folder_by_session(folder_path)
+token_cache = TokenCache(r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\tokenCache')  # Folder for cached tokenizations
+years, average_sentence_lengths = process_folder_by_session(folder_path, token_cache)
 plot_sentence_length_timeline(years, average_sentence_lengths, output_path)
+distribution = process_folder_sentence_length_distribution(folder_path, token_cache)
+plot_sentence_length_distribution(distribution, r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\s1_sentence_length_distribution_1946_2022.svg')
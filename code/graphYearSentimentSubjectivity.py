@@ -1,14 +1,11 @@
 import os
-import glob
 import re
 import nltk
 import matplotlib.pyplot as plt
 import numpy as np
 from textblob import TextBlob
 from nltk.tokenize import sent_tokenize, word_tokenize
-
-# Ensure you have NLTK's punkt tokenizer data
-nltk.download('punkt')
+from corpusReader import corpus_glob, open_corpus_text
 
 
 def preprocess_text(text):
@@ -34,7 +31,7 @@ def process_folder_by_session(folder_path):
     sentiment_subjectivities = []
     years = []
 
-    session_folders = glob.glob(os.path.join(folder_path, "Session*"))
+    session_folders = corpus_glob(os.path.join(folder_path, "Session*"))
 
     for session_folder in session_folders:
         # Extract year from folder name
@@ -49,9 +46,9 @@ def process_folder_by_session(folder_path):
             print(f"Processing year: {year}")
 
             # Process each txt file in the session folder
-            txt_files = glob.glob(os.path.join(session_folder, "*.txt"))
+            txt_files = corpus_glob(os.path.join(session_folder, "*.txt"))
             for txt_file in txt_files:
-                with open(txt_file, 'r', encoding='utf-8') as file:
+                with open_corpus_text(txt_file) as file:
                     content = file.read()
                     # Preprocess the text to remove page/paragraph numbers
                     preprocessed_content = preprocess_text(content)
@@ -76,7 +73,7 @@ def process_folder_by_session(folder_path):
     return years, sentiment_subjectivities
 
 
-def plot_sentiment_subjectivity_timeline(years, sentiment_subjectivities, output_path):
+def plot_sentiment_subjectivity_timeline(years, sentiment_subjectivities, output_path, band=None):
     if not years or not sentiment_subjectivities:
         print("No data to plot.")
         return
@@ -84,6 +81,9 @@ def plot_sentiment_subjectivity_timeline(years, sentiment_subjectivities, output
     fig, ax = plt.subplots(figsize=(10, 3))
     ax.plot(years, sentiment_subjectivities, marker='o', label='Sentiment Subjectivity')
 
+    if band is not None:
+        ax.fill_between(years, band[0], band[1], alpha=0.2, label='95% Confidence Interval')
+
     # Polynomial regression (e.g., a degree 5 polynomial)
     polynomial_degree = 5
     coefficients = np.polyfit(years, sentiment_subjectivities, polynomial_degree)
@@ -119,8 +119,9 @@ def plot_sentiment_subjectivity_timeline(years, sentiment_subjectivities, output
     plt.show()
 
 
-# Example usage:
-folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
-output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\s5_sentiment_subjectivity_1946_2022.svg'  # Path to save the SVG file
-years, sentiment_subjectivities = process_folder_by_session(folder_path)
-plot_sentiment_subjectivity_timeline(years, sentiment_subjectivities, output_path)
+if __name__ == '__main__':
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
+    output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\s5_sentiment_subjectivity_1946_2022.svg'  # Path to save the SVG file
+    years, sentiment_subjectivities = process_folder_by_session(folder_path)
+    plot_sentiment_subjectivity_timeline(years, sentiment_subjectivities, output_path)
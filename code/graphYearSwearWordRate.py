@@ -1,155 +1,62 @@
 import os
-import glob
 import re
 import nltk
 import matplotlib.pyplot as plt
 import numpy as np
-
-# Ensure you have NLTK's punkt tokenizer data
-nltk.download('punkt')
-
-
-def calculate_swear_word_rate(text):
-    """Calculate the rate of swear words in the text."""
-    '''
-    swear_words = {
-        "damn", "arse", "arsehole", "ass", "hell", "shit", "fuck", "crap", "bastard", "bitch",
-        "asshole", "douche", "slut", "whore", "dick", "piss", "cunt", "ass hole", "asshole", "bloody", "hell",
-        "prick", "motherfucker", "fucker", "cock", "bollocks", "bugger", "fuck", "cock", "nigga", "pussy",
-        "wanker", "bloody", "arse", "git", "tosser", "twat", "shite", "slut", "son of a whore", "fucker",
-        "damned", "fucking", "freaking", "frigging", "effing", "god damn", "twat", "wanker",
-        "shitty", "bitchy", "dickhead", "pissed", "pissing",
-        "cocksucker", "dumbass", "jackass", "butthead",
-        "son of a bitch", "son of a gun", "crappy", "asshat",
-        "asswipe", "shithead", "shitface", "fuckface", "fuckhead",
-        "dipshit", "dumbshit", "bullshit", "horseshit",
-        "bastarding", "dicking", "pricking", "screwing",
-        "bastardize", "bastardized", "fucked", "fucked up",
-        "screwed", "screwed up", "dickwad", "cuntface",
-        "dickweed", "dickless", "dicking around", "prickish"
-    }
-    '''
-    # crisis words
-    '''
-    swear_words = {
-        "war", "crisis", "conflict", "battle", "struggle", "fight", "dispute",
-        "emergency", "catastrophe", "calamity", "chaos", "disaster", "tumult",
-        "turbulence", "tragedy", "fiasco", "pandemic", "epidemic", "contagion",
-        "upheaval", "revolt", "revolution", "uprising", "insurrection", "rebellion",
-        "siege", "raid", "assault", "skirmish", "clash", "combat", "quarrel",
-        "feud", "confrontation", "collision", "turmoil", "disruption", "breakdown",
-        "collapse", "implosion", "chaotic", "hostility", "aggression", "violence",
-        "bloodshed", "havoc", "destruction", "annihilation", "ruin", "devastation",
-        "suffering", "hardship", "adversity", "trouble", "dilemma", "predicament",
-        "peril", "danger", "jeopardy", "threat", "risk", "hazard", "menace",
-        "distress", "panic", "alarm", "urgency", "alert", "plight", "emergency",
-        "displacement", "refugee", "exodus", "massacre", "genocide", "atrocity",
-        "terrorism", "siege", "assassination", "homicide", "murder", "extremism",
-        "hostage", "detention", "subversion", "insurgency", "guerrilla", "coup",
-        "oppression", "tyranny", "dictatorship", "famine", "drought", "earthquake",
-        "flood", "hurricane", "tsunami", "wildfire", "eruption", "landslide"
-    }
-    '''
-    # degree adverbs
-    '''
-    swear_words = {
-        "actually", "AFAIAA", "AFAIK", "all else being equal", "all in all",
-        "allegedly", "all things considered", "apparently", "arguably", "as a matter of fact",
-        "assuredly", "at bottom", "at first blush", "at first glance", "at first sight",
-        "believably", "certainly", "clearly", "conceivably", "conditionally",
-        "credibly", "debatably", "defendably", "defensibly", "definitely",
-        "doubtless", "doubtlessly", "essentially", "evidently", "evitably",
-        "fortunately", "hypothetically", "impossibly", "in essence", "in fact",
-        "in point of fact", "incontestably", "indeed", "indisputably", "indubitably",
-        "ineluctably", "inescapably", "inevitably", "IPOF", "likely",
-        "literally", "loosely", "manifestly", "maybe", "more and more",
-        "necessarily", "needlessly", "noticeably", "observably", "obviously",
-        "ostensibly", "ostensively", "patently", "perhaps", "plainly",
-        "plausibly", "positively", "possibly", "presumably", "presumptively",
-        "probably", "purportedly", "putatively", "questionlessly", "really",
-        "reportedly", "reputedly", "rumoredly", "rumouredly", "scarcely",
-        "seemingly", "statistically", "strictly", "sure", "surely",
-        "technically", "totally", "transparently", "truly", "unarguably",
-        "unavoidably", "undeniably", "undoubtably", "undoubtedly", "unfortunately",
-        "unnecessarily", "unquestionably", "verifiably", "without a doubt", "without doubt",
-        "arguably", "evidently", "apparently", "seemingly", "purportedly",
-        "ostensibly", "reportedly", "supposedly", "presumably", "allegedly",
-        "likely", "possibly", "potentially", "conceivably", "theoretically",
-        "categorically", "indisputably", "incontestably", "unquestionably",
-        "plainly", "distinctly", "manifestly", "patently", "self-evidently",
-        "axiomatically", "indubitably", "undoubtedly"
-    }
-    '''
-    #degree adverbs
-    '''
-    swear_words = {
-    "100 percent", "110 proof", "a bit", "a good deal", "a lot", "a tad",
-    "abnormally", "aboundingly", "about", "absolutely", "absurdly",
-    "abundantly", "acceptably", "accursedly", "ad infinitum", "ad nauseam",
-    "adequately", "admirably", "alarmingly", "all", "all-fired",
-    "almost", "altogether", "amazingly", "anything but", "approaching",
-    "as", "astronomically", "at all", "awfully", "bally",
-    "barely", "blasted", "bleeding", "bleeping", "blimming",
-    "blindingly", "bloody", "blooming", "boiling", "breathtakingly",
-    "clearly", "completely", "confederally", "considerably", "crazy",
-    "cussed", "damn", "damned", "darn", "darned",
-    "dead", "deservedly", "deuced", "deucedly", "doosed",
-    "downright", "dreadfully", "durn", "easily", "effing",
-    "embarrassingly", "enormously", "entirely", "epically", "equally",
-    "even", "ever so", "everloving", "exceedingly", "excessively",
-    "extensively", "extra", "extremely", "fairly", "fantastically",
-    "far", "flipping", "freaking", "fricking", "frigging",
-    "fucking", "fully", "goldurn", "good and", "greatly",
-    "hardly", "hella", "herostratically", "hideously", "highly",
-    "honkin'", "honkingly", "horribly", "how", "however",
-    "hugely", "immensely", "impossibly", "incredibly", "indeed",
-    "infinitely", "intensely", "jolly", "just", "largely",
-    "least", "less", "literally", "little", "lovely and",
-    "mad", "majorly", "mammothly", "mighty", "moderately",
-    "more", "more and more", "most", "motherfreaking", "motherfucking",
-    "much", "nearly", "needlessly", "nice and", "normally",
-    "not", "not at all", "noticeably", "observably", "outright",
-    "particularly", "partly", "peculiarly", "perfectly", "plain",
-    "pleasantly", "plum", "positively", "practically", "precious",
-    "pretty", "profoundly", "purely", "quite", "rather",
-    "real", "really", "reasonably", "relatively", "remarkably",
-    "scarcely", "shockingly", "simply", "slightly", "so",
-    "sofa king", "something", "somewhat", "spanking", "staggeringly",
-    "still", "stone", "strikingly", "strongly", "sufficiently",
-    "supremely", "suspiciously", "terminally", "terribly", "that",
-    "though", "to death", "too", "totally", "transfinitely",
-    "transitorily", "tremendously", "truly", "uberly", "unbelievably",
-    "unimaginably", "unnecessarily", "unrelatedly", "utterly", "very",
-    "virtually", "way", "well", "whole hog", "whoopingly",
-    "wicked", "wonderfully", "yet", "zoomorphically"
+from tokenCache import TokenCache
+from lexiconMatcher import LexiconMatcher, load_lexicons
+from resourceManager import require_punkt
+from corpusReader import corpus_glob, open_corpus_text
+
+
+# Word lists are kept in the wordlists folder, one file per lexicon
+lexicons = load_lexicons()
+lexicon_matcher = LexiconMatcher(lexicons)
+
+# Title and output file of the plot of every lexicon rate
+lexicon_plots = {
+    'first_person_singular': ('G1 - Self-Reference Rate from 1946 to 2022', 'g1_self_reference_rate_1946_2022.svg'),
+    'second_person': ('G2 - Direct Address Rate from 1946 to 2022', 'g2_direct_addresse_rate_1946_2022.svg'),
+    'modal_adverbs': ('G3 - Modal Adverb Rate from 1946 to 2022', 'g3_modal_adverb_rate_1946_2022.svg'),
+    'degree_adverbs': ('G4 - Degree Adverb Rate from 1946 to 2022', 'g4_degree_adverb_rate_1946_2022.svg'),
+    'negation': ('G5 - Negation Rate from 1946 to 2022', 'g5_negation_rate_1946_2022.svg'),
+    'swear_words': ('T1 - Swear Word Rate from 1946 to 2022', 't1_swear_word_rate_1946_2022.svg'),
+    'crisis_words': ('T2 - Crisis Word Rate from 1946 to 2022', 't2_crisis_word_rate_1946_2022.svg'),
 }
-'''
 
-# negation
 
-    swear_words = {
-    "no", "none", "not", "nothing", "nobody", "nowhere", "neither",
-    "nor", "never",
-    }
+def calculate_swear_word_rate(text, words=None, lexicon='negation'):
+    """Calculate the rate of words from one lexicon in the text (or in already lower-cased word tokens)."""
+    # Tokenize the text into words
+    if words is None:
+        # Ensure you have NLTK's punkt tokenizer data (looked up locally, no network access unless allowed)
+        require_punkt()
+        words = nltk.word_tokenize(text.lower())
+
+    # Calculate the rate of swear words, multi-word entries count once per phrase
+    return lexicon_matcher.rates(words)[lexicon]
 
 
-    # Tokenize the text into words
-    words = nltk.word_tokenize(text.lower())
-    total_words = len(words)
-    swear_word_count = sum(1 for word in words if word in swear_words)
+def calculate_lexicon_rates(text, words=None):
+    """Calculate the rate of every lexicon in the text with a single scan."""
+    if words is None:
+        require_punkt()
+        words = nltk.word_tokenize(text.lower())
+    return lexicon_matcher.rates(words)
 
-    # Calculate the rate of swear words
-    if total_words == 0:
-        return 0
-    return swear_word_count / total_words
 
+def process_folder_by_session(folder_path, token_cache=None, lexicon='negation'):
+    """Process each session folder, calculate average rate of one lexicon per year (tokens from token_cache if given)."""
+    years, lexicon_rates = process_folder_by_session_all_lexicons(folder_path, token_cache)
+    return years, lexicon_rates.get(lexicon, [])
 
-def process_folder_by_session(folder_path):
-    """Process each session folder, calculate average swear word rate per year."""
-    swear_word_rates = []
+
+def process_folder_by_session_all_lexicons(folder_path, token_cache=None):
+    """Process each session folder, calculate the average rate of every lexicon per year in one pass."""
+    lexicon_rates = {name: [] for name in lexicon_matcher.names}
     years = []
 
-    session_folders = glob.glob(os.path.join(folder_path, "Session*"))
+    session_folders = corpus_glob(os.path.join(folder_path, "Session*"))
 
     for session_folder in session_folders:
         # Extract year from folder name
@@ -161,31 +68,35 @@ def process_folder_by_session(folder_path):
 
             if year in [1948, 1949]:
                 continue  # Skip years 1948 and 1949
-            year_swear_word_rates = []
+            year_lexicon_rates = []
             print(f"Processing year: {year}")
 
             # Process each txt file in the session folder
-            txt_files = glob.glob(os.path.join(session_folder, "*.txt"))
+            txt_files = corpus_glob(os.path.join(session_folder, "*.txt"))
             for txt_file in txt_files:
-                with open(txt_file, 'r', encoding='utf-8') as file:
+                with open_corpus_text(txt_file) as file:
                     content = file.read()
-                    swear_word_rate = calculate_swear_word_rate(content)
-                    year_swear_word_rates.append(swear_word_rate)
-
-            # Calculate the average swear word rate for the year
-            if year_swear_word_rates:
-                avg_swear_word_rate = sum(year_swear_word_rates) / len(year_swear_word_rates)
-                swear_word_rates.append(avg_swear_word_rate)
+                    words = token_cache.word_tokenize(content.lower()) if token_cache else None
+                    year_lexicon_rates.append(calculate_lexicon_rates(content, words=words))
+
+            # Calculate the average rate of every lexicon for the year
+            if year_lexicon_rates:
+                for name in lexicon_rates:
+                    rates = [speech_rates[name] for speech_rates in year_lexicon_rates]
+                    lexicon_rates[name].append(sum(rates) / len(rates))
                 years.append(year)
             else:
                 print(f"No valid text files found for year: {year}")
 
+    if token_cache is not None:
+        token_cache.save()
+        token_cache.report()
     if not years:
         print("No data found. Please check the folder path and structure.")
-    return years, swear_word_rates
+    return years, lexicon_rates
 
 
-def plot_swear_word_rate_timeline(years, swear_word_rates, output_path):
+def plot_swear_word_rate_timeline(years, swear_word_rates, output_path, title='G5 - Negation Rate from 1946 to 2022', band=None):
     if not years or not swear_word_rates:
         print("No data to plot.")
         return
@@ -193,6 +104,9 @@ def plot_swear_word_rate_timeline(years, swear_word_rates, output_path):
     fig, ax = plt.subplots(figsize=(10, 3))
     ax.plot(years, swear_word_rates, marker='o', label='Swear Word Rate')
 
+    if band is not None:
+        ax.fill_between(years, band[0], band[1], alpha=0.2, label='95% Confidence Interval')
+
     # Polynomial regression (e.g., a degree 3 polynomial)
     polynomial_degree = 5
     coefficients = np.polyfit(years, swear_word_rates, polynomial_degree)
@@ -206,7 +120,7 @@ def plot_swear_word_rate_timeline(years, swear_word_rates, output_path):
     ax.plot(x_values, y_values, color='red')
 
     # Set title with padding
-    ax.set_title('G5 - Negation Rate from 1946 to 2022', pad=20)
+    ax.set_title(title, pad=20)
 
     ax.grid(True)
 
@@ -228,8 +142,11 @@ def plot_swear_word_rate_timeline(years, swear_word_rates, output_path):
     plt.show()
 
 
-# Example usage:
-folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
-output_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs\g5_negation_rate_1946_2022.svg'  # Path to save the SVG file
-years, swear_word_rates = process_folder_by_session(folder_path)
-plot_swear_word_rate_timeline(years, swear_word_rates, output_path)
+if __name__ == '__main__':
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
+    output_folder = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs'  # Folder to save the SVG files
+    token_cache = TokenCache(r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\tokenCache')  # Folder for cached tokenizations
+    years, lexicon_rates = process_folder_by_session_all_lexicons(folder_path, token_cache)
+    for name, (title, file_name) in lexicon_plots.items():
+        plot_swear_word_rate_timeline(years, lexicon_rates[name], os.path.join(output_folder, file_name), title)
@@ -0,0 +1,82 @@
+import os
+import glob
+from nltk.tokenize import word_tokenize
+
+# Word lists shipped with the scripts, one .txt file per lexicon
+LEXICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wordlists')
+
+
+def load_lexicon(path):
+    """Read a word list file, one entry per line, skipping blank lines and '#' comments."""
+    entries = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            entry = line.strip()
+            if entry and not entry.startswith('#'):
+                entries.append(entry)
+    return entries
+
+
+def load_lexicons(folder_path=LEXICON_FOLDER):
+    """Load every word list in the folder as {file name without extension: entries}."""
+    lexicons = {}
+    for path in sorted(glob.glob(os.path.join(folder_path, '*.txt'))):
+        lexicons[os.path.splitext(os.path.basename(path))[0]] = load_lexicon(path)
+    return lexicons
+
+
+class LexiconMatcher:
+    """All lexicons compiled into one token trie, so a single scan counts matches for every lexicon.
+
+    Entries are lower-cased and tokenized like the speeches, so multi-word entries such as
+    "son of a bitch" or "more and more" are matched as phrases. Within a lexicon matches are
+    leftmost-longest and do not overlap, so every token counts towards at most one entry.
+    """
+
+    def __init__(self, lexicons):
+        self.names = list(lexicons)
+        # Each node maps a token to its child node; the key None holds the lexicons ending there
+        self.trie = {}
+        for name, entries in lexicons.items():
+            for entry in entries:
+                node = self.trie
+                for token in word_tokenize(entry.lower(), preserve_line=True):
+                    node = node.setdefault(token, {})
+                node.setdefault(None, set()).add(name)
+
+    def count(self, words):
+        """Return {lexicon name: number of matches} for a list of lower-cased word tokens."""
+        counts = dict.fromkeys(self.names, 0)
+        # Position from which the next match of each lexicon may start
+        next_start = dict.fromkeys(self.names, 0)
+        trie = self.trie
+
+        for i, word in enumerate(words):
+            node = trie.get(word)
+            if node is None:
+                continue
+
+            # Longest match length of every lexicon starting at position i
+            match_lengths = {}
+            length = 1
+            while node is not None:
+                for name in node.get(None, ()):
+                    match_lengths[name] = length
+                if i + length >= len(words):
+                    break
+                node = node.get(words[i + length])
+                length += 1
+
+            for name, match_length in match_lengths.items():
+                if i >= next_start[name]:
+                    counts[name] += 1
+                    next_start[name] = i + match_length
+
+        return counts
+
+    def rates(self, words):
+        """Return {lexicon name: matches per token} for a list of lower-cased word tokens."""
+        total_words = len(words)
+        if total_words == 0:
+            return dict.fromkeys(self.names, 0)
+        return {name: count / total_words for name, count in self.count(words).items()}
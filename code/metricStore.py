@@ -0,0 +1,131 @@
+import os
+import sqlite3
+
+
+class Ratio(float):
+    """A per-speech value that is numerator / denominator (0 without a denominator), keeping both parts.
+
+    Behaves as the float value everywhere else; the metric store also records the parts, so
+    pooled (token-weighted) averages can be computed later.
+    """
+
+    def __new__(cls, numerator, denominator):
+        value = super().__new__(cls, numerator / denominator if denominator else 0)
+        value.numerator = numerator
+        value.denominator = denominator
+        return value
+
+    def __getnewargs__(self):
+        return self.numerator, self.denominator
+
+
+def country_of(txt_file):
+    """Return the country code of a speech file, its file name without extension."""
+    return os.path.splitext(os.path.basename(txt_file))[0]
+
+
+class MetricStore:
+    """SQLite table of every per-speech metric value, keyed by speech, metric, metric version and series.
+
+    Filled by corpusEngine.run_metrics; year curves, pooled averages and country slices are then
+    queries over this table instead of another pass over the text. A speech's values of a metric
+    are replaced as a whole, so series it no longer produces do not linger.
+    """
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS speech_metrics ("
+                "session INTEGER NOT NULL, year INTEGER NOT NULL, country TEXT NOT NULL, "
+                "metric TEXT NOT NULL, metric_version INTEGER NOT NULL, series TEXT NOT NULL, "
+                "value REAL NOT NULL, numerator REAL, denominator REAL, "
+                "PRIMARY KEY (session, country, metric, metric_version, series))")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS speech_metrics_year ON speech_metrics (series, year)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS speech_metrics_country ON speech_metrics (series, country)")
+        self._rows = []
+        # (session, country, metric name) of every speech and metric added since the last commit
+        self._speeches = set()
+        self._pruned_metrics = set()
+
+    def add(self, session, year, txt_file, metric, values):
+        """Queue the {series name: value} of one metric on one speech; Ratio values keep their parts."""
+        country = country_of(txt_file)
+        self._speeches.add((session, country, metric.name))
+        for series, value in values.items():
+            numerator = getattr(value, 'numerator', None)
+            denominator = getattr(value, 'denominator', None)
+            self._rows.append((session, year, country, metric.name, metric.version, series, float(value),
+                               numerator, denominator))
+
+    def prune(self, metrics):
+        """On the next commit, delete the rows of these metrics for every speech not added since the last one."""
+        self._pruned_metrics.update(metric.name for metric in metrics)
+
+    def commit(self):
+        """Write the queued rows in one transaction.
+
+        All earlier rows of an added speech and metric are deleted first, also those of an empty value
+        dict, and the rows of pruned metrics for speeches that were not added.
+        """
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS added_speeches "
+                                    "(session INTEGER NOT NULL, country TEXT NOT NULL, metric TEXT NOT NULL)")
+            self.connection.execute("DELETE FROM added_speeches")
+            self.connection.executemany("INSERT INTO added_speeches VALUES (?, ?, ?)", self._speeches)
+            self.connection.execute(
+                "DELETE FROM speech_metrics WHERE (session, country, metric) IN "
+                "(SELECT session, country, metric FROM added_speeches)")
+            if self._pruned_metrics:
+                self.connection.execute(
+                    f"DELETE FROM speech_metrics WHERE metric IN ({','.join('?' * len(self._pruned_metrics))}) "
+                    "AND (session, country, metric) NOT IN (SELECT session, country, metric FROM added_speeches)",
+                    list(self._pruned_metrics))
+            self.connection.executemany(
+                "INSERT INTO speech_metrics "
+                "(session, year, country, metric, metric_version, series, value, numerator, denominator) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", self._rows)
+        self._rows = []
+        self._speeches = set()
+        self._pruned_metrics = set()
+
+    def _latest_version_filter(self):
+        # Only the newest version of the metric that produced the series counts
+        return ("metric_version = (SELECT MAX(metric_version) FROM speech_metrics AS latest "
+                "WHERE latest.series = speech_metrics.series AND latest.metric = speech_metrics.metric)")
+
+    def year_curve(self, series, weighted=False, countries=None):
+        """Return (years, yearly values) of a series, optionally for some countries only.
+
+        The default is the mean of the per-speech values, like run_metrics; weighted=True pools the
+        numerators and denominators of Ratio series instead (e.g. a token-weighted lexicon rate).
+        """
+        aggregate = "SUM(numerator) / SUM(denominator)" if weighted else "AVG(value)"
+        query = (f"SELECT year, {aggregate} FROM speech_metrics WHERE series = ? AND "
+                 f"{self._latest_version_filter()}")
+        parameters = [series]
+        if countries is not None:
+            query += f" AND country IN ({','.join('?' * len(countries))})"
+            parameters.extend(countries)
+        rows = self.connection.execute(query + " GROUP BY year ORDER BY year", parameters).fetchall()
+        return [year for year, _ in rows], [value for _, value in rows]
+
+    def country_curve(self, series, country, weighted=False):
+        """Return (years, values) of a series for one country."""
+        return self.year_curve(series, weighted, countries=[country])
+
+    def speech_values(self, series, year=None, country=None):
+        """Return the (session, year, country, value, numerator, denominator) rows of a series."""
+        query = ("SELECT session, year, country, value, numerator, denominator FROM speech_metrics "
+                 f"WHERE series = ? AND {self._latest_version_filter()}")
+        parameters = [series]
+        if year is not None:
+            query += " AND year = ?"
+            parameters.append(year)
+        if country is not None:
+            query += " AND country = ?"
+            parameters.append(country)
+        return self.connection.execute(query + " ORDER BY year, country", parameters).fetchall()
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,104 @@
+import os
+import re
+import argparse
+import numpy as np
+
+# A word is a token holding at least one letter or digit, punctuation tokens are not counted
+WORD_PATTERN = re.compile(r'\w')
+
+
+def readability_counts(sentences, words, syllables, sentence_offsets):
+    """Gather the per-speech counts every readability formula is computed from.
+
+    Takes the speech's sentences, word tokens, per-token syllable counts and the token offsets of
+    its sentences (the engine's 'sentences', 'words' and 'syllables' inputs and the segmentation's
+    offsets).
+    """
+    syllables = np.asarray(syllables, dtype=np.int64)
+    is_word = np.fromiter((WORD_PATTERN.search(token) is not None for token in words), dtype=bool, count=len(words))
+    word_syllables = syllables[is_word]
+    polysyllabic = word_syllables >= 3
+    # The first word of every sentence, leading punctuation skipped
+    word_positions = np.flatnonzero(is_word)
+    sentence_offsets = np.asarray(sentence_offsets, dtype=np.int64)
+    first_words = np.searchsorted(word_positions, sentence_offsets[:-1])
+    sentence_initial = np.zeros(len(words), dtype=bool)
+    has_word = first_words < len(word_positions)
+    first_positions = word_positions[first_words[has_word]]
+    sentence_initial[first_positions[first_positions < sentence_offsets[1:][has_word]]] = True
+    # Gunning Fog leaves out proper nouns (capitalized words not starting a sentence) and hyphenated compounds
+    proper = np.fromiter((token[0].isupper() for token in words), dtype=bool, count=len(words)) & ~sentence_initial
+    plain = ~proper & np.fromiter(('-' not in token for token in words), dtype=bool, count=len(words))
+    return {
+        'sentences': len(sentences),
+        'words': int(is_word.sum()),
+        'syllables': int(word_syllables.sum()),
+        'polysyllables': int(polysyllabic.sum()),
+        'characters': sum(len(token) for token, counted in zip(words, is_word) if counted),
+        'complex_words': int((polysyllabic & plain[is_word]).sum()),
+    }
+
+
+def flesch_reading_ease(counts):
+    return 206.835 - 1.015 * counts['words'] / counts['sentences'] - 84.6 * counts['syllables'] / counts['words']
+
+
+def flesch_kincaid_grade(counts):
+    return 0.39 * counts['words'] / counts['sentences'] + 11.8 * counts['syllables'] / counts['words'] - 15.59
+
+
+def gunning_fog(counts):
+    return 0.4 * (counts['words'] / counts['sentences'] + 100 * counts['complex_words'] / counts['words'])
+
+
+def smog(counts):
+    return 1.0430 * np.sqrt(counts['polysyllables'] * 30 / counts['sentences']) + 3.1291
+
+
+def coleman_liau(counts):
+    letters_per_100_words = 100 * counts['characters'] / counts['words']
+    sentences_per_100_words = 100 * counts['sentences'] / counts['words']
+    return 0.0588 * letters_per_100_words - 0.296 * sentences_per_100_words - 15.8
+
+
+def automated_readability_index(counts):
+    return 4.71 * counts['characters'] / counts['words'] + 0.5 * counts['words'] / counts['sentences'] - 21.43
+
+
+# Every index of the suite: series name -> (formula over readability_counts, plot title, SVG file name)
+READABILITY_FORMULAS = {
+    'flesch_reading_ease': (flesch_reading_ease, 'R1 - Flesch Reading Ease from 1946 to 2022',
+                            'r1_flesch_reading_ease_1946_2022.svg'),
+    'flesch_kincaid_grade': (flesch_kincaid_grade, 'R2 - Flesch-Kincaid Grade Level from 1946 to 2022',
+                             'r2_flesch_kincaid_grade_1946_2022.svg'),
+    'gunning_fog': (gunning_fog, 'R3 - Gunning Fog Index from 1946 to 2022', 'r3_gunning_fog_1946_2022.svg'),
+    'smog': (smog, 'R4 - SMOG Grade from 1946 to 2022', 'r4_smog_1946_2022.svg'),
+    'coleman_liau': (coleman_liau, 'R5 - Coleman-Liau Index from 1946 to 2022', 'r5_coleman_liau_1946_2022.svg'),
+    'automated_readability_index': (automated_readability_index, 'R6 - Automated Readability Index from 1946 to 2022',
+                                    'r6_automated_readability_index_1946_2022.svg'),
+}
+
+
+def readability_scores(counts):
+    """Apply every formula of READABILITY_FORMULAS to one speech's counts, None without sentences or words."""
+    if counts['sentences'] == 0 or counts['words'] == 0:
+        return None
+    return {name: float(formula(counts)) for name, (formula, _, _) in READABILITY_FORMULAS.items()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='R1-R6 - Readability indices from one pass over the corpus.')
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes (default: 1, serial)')
+    args = parser.parse_args()
+
+    from corpusEngine import ReadabilityMetric, run_metrics
+    from graphYearFleschKincaidsReadabilityEase import plot_fk_re_timeline
+    from tokenCache import TokenCache
+
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
+    output_folder = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs'  # Folder to save the SVG files
+    token_cache = TokenCache(r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\tokenCache')  # Folder for cached tokenizations
+    results = run_metrics(folder_path, [ReadabilityMetric()], token_cache=token_cache, workers=args.workers)
+    for name, (_, title, file_name) in READABILITY_FORMULAS.items():
+        plot_fk_re_timeline(*results[name], os.path.join(output_folder, file_name), title)
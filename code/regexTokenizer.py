@@ -0,0 +1,116 @@
+import re
+import random
+import argparse
+from collections import Counter
+import numpy as np
+
+# Straight double quotes become `` and '' like in the Treebank tokenizer
+OPENING_QUOTE = re.compile(r'(^|[\s(\[{<])"')
+CLOSING_QUOTE = re.compile(r'"')
+
+# Characters a token can be made of; everything else is split off as punctuation
+WORD_CHARACTERS = r"""[^\s.,;:@#$%&?!()\[\]{}<>"'`]"""
+
+# One pass over the text, alternatives tried in order. Tuned for UN speeches: initialisms
+# (U.N., U.S.S.R.), forms of address, thousands separators and hyphenated compounds stay whole,
+# contractions are split the Treebank way (do n't, it 's).
+TOKEN_PATTERN = re.compile(r"""
+    (?:[A-Za-z]\.){2,}                                # initialisms: U.N., i.e.
+  | (?:Mr|Mrs|Ms|Dr|Prof|St|No|Nos|Art|Arts|Gen|Jr|Sr|Co|Inc|Ltd|vs|etc)\.(?=\s+\w)   # abbreviations mid-sentence
+  | \d+(?:[.,]\d+)+                                   # numbers with separators: 1,000.50
+  | WORD+(?=(?i:n't)\b)                               # stem of a negated contraction: do|n't, ca|n't
+  | (?i:n't)\b
+  | '(?i:s|re|ve|ll|d|m)\b                            # clitics: 's, 're, 've
+  | WORD+(?:\.WORD+)*                                 # words, hyphenated compounds, dotted names
+  | \.{2,}|``|''
+  | \S
+""".replace('WORD', WORD_CHARACTERS), re.VERBOSE)
+
+
+def regex_word_tokenize(text):
+    """Split text into Treebank-like word tokens with one precompiled regex, without sentence splitting."""
+    text = OPENING_QUOTE.sub(r'\1 `` ', text)
+    text = CLOSING_QUOTE.sub(" '' ", text)
+    return TOKEN_PATTERN.findall(text)
+
+
+def token_agreement(reference_tokens, tokens):
+    """Share of tokens two tokenizations have in common (as multisets), relative to the longer one."""
+    longest = max(len(reference_tokens), len(tokens))
+    if longest == 0:
+        return 1.0
+    common = Counter(reference_tokens) & Counter(tokens)
+    return sum(common.values()) / longest
+
+
+def tokenizer_parity_report(folder_path, metric_factories, speeches_per_year=5, tolerance=0.01, token_cache=None,
+                            skip_years=None, workers=1):
+    """Compare the regex backend with NLTK's Treebank tokenizer.
+
+    Prints the token-level agreement on a sample of speeches of every year, then runs every metric
+    with both backends in one run over the corpus and reports the largest per-year difference of
+    each series relative to the range of its Treebank curve. metric_factories are callables taking
+    the tokenizer name and returning a metric. Returns {series name: relative difference}; series within
+    tolerance can use the regex backend. skip_years is passed to run_metrics, None keeps every
+    metric's own years.
+    """
+    from corpusEngine import SpeechInputs, iter_session_files, run_metrics
+    from corpusReader import open_corpus_text
+
+    speeches_by_year = {}
+    for _, year, txt_file in iter_session_files(folder_path, skip_years or ()):
+        speeches_by_year.setdefault(year, []).append(txt_file)
+
+    agreements = []
+    count_ratios = []
+    for year, txt_files in speeches_by_year.items():
+        for txt_file in random.Random(year).sample(txt_files, min(speeches_per_year, len(txt_files))):
+            with open_corpus_text(txt_file) as file:
+                inputs = SpeechInputs(file.read(), token_cache)
+            if not inputs.get('cleaned').strip():
+                continue
+            reference_tokens = inputs.get('words')
+            tokens = inputs.get('regex_words')
+            agreements.append(token_agreement(reference_tokens, tokens))
+            count_ratios.append(len(tokens) / max(len(reference_tokens), 1))
+    if agreements:
+        print(f"Token agreement on {len(agreements)} speeches: mean {np.mean(agreements):.2%}, "
+              f"min {np.min(agreements):.2%}; regex/Treebank token count ratio {np.mean(count_ratios):.3f}")
+
+    # Every series of a regex metric is named like the Treebank one plus the backend suffix
+    results = run_metrics(folder_path, [factory(tokenizer) for factory in metric_factories
+                                        for tokenizer in ('treebank', 'regex')],
+                          skip_years, token_cache=token_cache, workers=workers)
+
+    deltas = {}
+    for name, (years, values) in results.items():
+        if name.endswith('_regex'):
+            continue
+        regex_years, regex_values = results.get(f'{name}_regex', ([], []))
+        if regex_years != years:
+            continue
+        values = np.array(values)
+        curve_range = np.ptp(values) or 1.0
+        deltas[name] = float(np.max(np.abs(np.array(regex_values) - values)) / curve_range)
+        verdict = 'regex OK' if deltas[name] <= tolerance else 'keep treebank'
+        print(f"{name}: max yearly difference {deltas[name]:.2%} of the curve range ({verdict})")
+    return deltas
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the regex tokenizer with NLTK Treebank on the corpus.')
+    parser.add_argument('--tolerance', type=float, default=0.01, help='largest acceptable curve difference (default: 0.01)')
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes (default: 1, serial)')
+    args = parser.parse_args()
+
+    from corpusEngine import LexiconRatesMetric, MovingTTRMetric, NumberRateMetric
+    from tokenCache import TokenCache
+
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
+    token_cache = TokenCache(r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\tokenCache')  # Folder for cached tokenizations
+    tokenizer_parity_report(folder_path, [
+        lambda tokenizer: LexiconRatesMetric(tokenizer=tokenizer),
+        lambda tokenizer: MovingTTRMetric(window_size=500, tokenizer=tokenizer),
+        lambda tokenizer: NumberRateMetric(tokenizer=tokenizer),
+    ], tolerance=args.tolerance, token_cache=token_cache, workers=args.workers)
@@ -0,0 +1,108 @@
+import os
+import re
+import functools
+
+# Local folder holding nltk_data/ and models/, override with the UNGD_RESOURCES environment variable
+RESOURCE_DIR = os.environ.get('UNGD_RESOURCES',
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources'))
+
+# The network is only used when explicitly allowed (UNGD_ALLOW_DOWNLOAD=1 or allow_downloads())
+ALLOW_DOWNLOAD = os.environ.get('UNGD_ALLOW_DOWNLOAD') == '1'
+if not ALLOW_DOWNLOAD:
+    # Keep transformers from checking the Hugging Face hub for updates
+    os.environ.setdefault('HF_HUB_OFFLINE', '1')
+
+# Path of every NLTK package inside an nltk_data folder
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'cmudict': 'corpora/cmudict',
+}
+
+
+def allow_downloads():
+    """Let missing resources be downloaded into RESOURCE_DIR."""
+    global ALLOW_DOWNLOAD
+    ALLOW_DOWNLOAD = True
+    os.environ.pop('HF_HUB_OFFLINE', None)
+
+
+def nltk_data_dir():
+    return os.path.join(RESOURCE_DIR, 'nltk_data')
+
+
+@functools.lru_cache(maxsize=None)
+def require_nltk_data(name):
+    """Make sure an NLTK package is available, looking in RESOURCE_DIR first and never downloading unless allowed."""
+    import nltk
+
+    if nltk_data_dir() not in nltk.data.path:
+        nltk.data.path.insert(0, nltk_data_dir())
+    try:
+        nltk.data.find(NLTK_RESOURCES.get(name, name))
+    except LookupError:
+        if not ALLOW_DOWNLOAD:
+            raise LookupError(f"NLTK resource '{name}' not found in {nltk_data_dir()} or the NLTK data path. "
+                              f"Copy it there or set UNGD_ALLOW_DOWNLOAD=1 to download it.")
+        nltk.download(name, download_dir=nltk_data_dir())
+
+
+def punkt_package():
+    """Return the name of the Punkt package NLTK loads: punkt_tab from NLTK 3.9 on, the pickled punkt before."""
+    import nltk
+
+    version = tuple(int(part) for part in re.findall(r'\d+', nltk.__version__)[:2])
+    return 'punkt_tab' if version >= (3, 9) else 'punkt'
+
+
+def require_punkt():
+    """Make sure the Punkt sentence tokenizer data of the installed NLTK is available, see require_nltk_data."""
+    require_nltk_data(punkt_package())
+
+
+@functools.lru_cache(maxsize=None)
+def cmu_dictionary():
+    """Return the CMU Pronouncing Dictionary, loaded on first use."""
+    require_nltk_data('cmudict')
+    from nltk.corpus import cmudict
+    return cmudict.dict()
+
+
+def model_dir(model_name):
+    return os.path.join(RESOURCE_DIR, 'models', model_name.replace('/', '--'))
+
+
+def resolve_model(model_name):
+    """Return a local directory holding a Hugging Face model, given its hub name or a directory.
+
+    Looks in RESOURCE_DIR/models and only downloads (and saves there) when allowed.
+    """
+    if os.path.isdir(model_name):
+        return model_name
+    path = model_dir(model_name)
+    if os.path.isdir(path):
+        return path
+    if not ALLOW_DOWNLOAD:
+        raise OSError(f"Model '{model_name}' not found in {path}. "
+                      f"Copy it there or set UNGD_ALLOW_DOWNLOAD=1 to download it.")
+
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(path)
+    AutoModelForSequenceClassification.from_pretrained(model_name).save_pretrained(path)
+    return path
+
+
+@functools.lru_cache(maxsize=None)
+def hf_tokenizer(model_name):
+    """Return the tokenizer of a Hugging Face model, loaded from the local copy on first use."""
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(resolve_model(model_name))
+
+
+@functools.lru_cache(maxsize=None)
+def hf_classifier(model_name):
+    """Return a Hugging Face sequence classifier in eval mode, loaded from the local copy on first use."""
+    from transformers import AutoModelForSequenceClassification
+    classifier = AutoModelForSequenceClassification.from_pretrained(resolve_model(model_name))
+    classifier.eval()
+    return classifier
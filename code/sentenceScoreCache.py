@@ -0,0 +1,71 @@
+import re
+import sqlite3
+import hashlib
+
+
+def normalize_sentence(sentence):
+    """Collapse whitespace, which the model's tokenizer ignores anyway."""
+    return re.sub(r'\s+', ' ', sentence).strip()
+
+
+def sentence_hash(sentence):
+    return hashlib.sha1(normalize_sentence(sentence).encode('utf-8')).hexdigest()
+
+
+class SentenceScoreCache:
+    """SQLite cache of per-sentence model scores keyed by model ID and normalized-sentence hash.
+
+    Boilerplate sentences ("Mr. President, ...") repeat across speeches and years; with this
+    cache every unique sentence goes through a given model once, across runs.
+    """
+
+    def __init__(self, path, model_id):
+        self.model_id = model_id
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS sentence_scores ("
+            "model_id TEXT NOT NULL, sentence_hash TEXT NOT NULL, probability REAL NOT NULL, "
+            "PRIMARY KEY (model_id, sentence_hash))")
+        self.sentences_seen = 0
+        self.sentences_scored = 0
+
+    def score(self, sentences, score_function):
+        """Return the score of every sentence, calling score_function only on unique uncached sentences."""
+        hashes = [sentence_hash(sentence) for sentence in sentences]
+
+        # Deduplicate, then look the unique sentences up in the cache
+        unique_sentences = {}
+        for sentence, digest in zip(sentences, hashes):
+            unique_sentences.setdefault(digest, sentence)
+        scores = {}
+        unique_hashes = list(unique_sentences)
+        for start in range(0, len(unique_hashes), 500):
+            chunk = unique_hashes[start:start + 500]
+            rows = self.connection.execute(
+                f"SELECT sentence_hash, probability FROM sentence_scores "
+                f"WHERE model_id = ? AND sentence_hash IN ({','.join('?' * len(chunk))})",
+                [self.model_id] + chunk)
+            scores.update(rows)
+
+        # Score what is missing and store it
+        missing = [digest for digest in unique_hashes if digest not in scores]
+        if missing:
+            new_scores = score_function([unique_sentences[digest] for digest in missing])
+            scores.update(zip(missing, new_scores))
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO sentence_scores (model_id, sentence_hash, probability) VALUES (?, ?, ?)",
+                    [(self.model_id, digest, scores[digest]) for digest in missing])
+
+        self.sentences_seen += len(sentences)
+        self.sentences_scored += len(missing)
+        return [scores[digest] for digest in hashes]
+
+    def report(self):
+        saved = self.sentences_seen - self.sentences_scored
+        hit_rate = saved / self.sentences_seen if self.sentences_seen else 0
+        print(f"Sentence cache: {self.sentences_seen} sentences, {self.sentences_scored} scored by the model, "
+              f"{saved} forward passes saved ({hit_rate:.1%} hit rate)")
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,110 @@
+import nltk
+import numpy as np
+from resourceManager import require_punkt
+
+
+class Segmentation:
+    """Word tokens of a text plus its sentence boundaries, from one Punkt pass and one tokenizer pass.
+
+    offsets[i]:offsets[i + 1] are the tokens of sentence i and spans[i] its (start, end) character
+    span in the text, so sentence lengths are np.diff(offsets) and sentence strings need no second
+    Punkt pass. ids holds the token IDs when the segmentation came from a tokenCache.TokenCache.
+    """
+
+    def __init__(self, words, offsets, spans, ids=None):
+        self.words = words
+        self.offsets = offsets
+        self.spans = spans
+        self.ids = ids
+
+    def sentence_lengths(self):
+        """Return the number of tokens of every sentence."""
+        return np.diff(self.offsets)
+
+    def sentences(self, text):
+        """Return the sentence strings of the text this segmentation was made from."""
+        return [text[start:end] for start, end in self.spans.tolist()]
+
+    def sentence_words(self):
+        """Return the tokens of every sentence as a list of lists."""
+        offsets = self.offsets.tolist()
+        return [self.words[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+def sentence_spans(text, sentences):
+    """Locate the sentences returned by nltk.sent_tokenize(text) in the text, as an (n, 2) array."""
+    spans = np.empty((len(sentences), 2), dtype=np.int64)
+    position = 0
+    for i, sentence in enumerate(sentences):
+        # Punkt returns slices of the text, so every sentence is found at or after the previous one
+        start = text.find(sentence, position)
+        if start < 0:
+            start = position
+        position = start + len(sentence)
+        spans[i] = (start, position)
+    return spans
+
+
+def split_sentences(text):
+    """Return the sentence spans of nltk.sent_tokenize(text) from one Punkt pass, without word tokens."""
+    require_punkt()
+    return sentence_spans(text, nltk.sent_tokenize(text))
+
+
+def segment_tokens(text):
+    """Split a text into sentences once and tokenize every sentence once.
+
+    Returns (tokens per sentence, character spans). Concatenated, the tokens equal
+    nltk.word_tokenize(text), which splits sentences the same way internally.
+    """
+    require_punkt()
+    sentences = nltk.sent_tokenize(text)
+    # preserve_line=True keeps word_tokenize from running Punkt on every sentence again
+    sentence_tokens = [nltk.word_tokenize(sentence, preserve_line=True) for sentence in sentences]
+    return sentence_tokens, sentence_spans(text, sentences)
+
+
+def segment_text(text):
+    """Return the Segmentation of a text without a token cache."""
+    sentence_tokens, spans = segment_tokens(text)
+    offsets = np.cumsum([0] + [len(tokens) for tokens in sentence_tokens], dtype=np.int64)
+    return Segmentation([token for tokens in sentence_tokens for token in tokens], offsets, spans)
+
+
+def word_tokenize_sentence_lengths(text, segmentation):
+    """Return the sentence lengths nltk.word_tokenize gives every sentence of the segmentation on its own.
+
+    word_tokenize runs Punkt again on a lone sentence, which now and then splits it further and
+    tokenizes the pieces differently. Only sentences with a Punkt break candidate inside are redone.
+    """
+    lengths = segmentation.sentence_lengths()
+    break_candidate = nltk.tokenize.punkt.PunktLanguageVars().period_context_re()
+    for i, (start, end) in enumerate(segmentation.spans.tolist()):
+        sentence = text[start:end]
+        if break_candidate.search(sentence):
+            require_punkt()
+            lengths[i] = len(nltk.word_tokenize(sentence))
+    return lengths
+
+
+def sentence_length_stats(lengths, percentiles=(10, 25, 75, 90)):
+    """Summarize an array of sentence lengths: count, mean, std, median and percentiles."""
+    lengths = np.asarray(lengths)
+    if len(lengths) == 0:
+        return None
+    stats = {
+        'sentence_count': int(len(lengths)),
+        'sentence_length_mean': float(lengths.mean()),
+        'sentence_length_std': float(lengths.std()),
+        'sentence_length_median': float(np.median(lengths)),
+    }
+    for percentile, value in zip(percentiles, np.percentile(lengths, percentiles)):
+        stats[f'sentence_length_p{percentile}'] = float(value)
+    return stats
+
+
+def sentence_length_histogram(lengths, bin_edges):
+    """Return the share of sentences falling in each bin of bin_edges; longer sentences go in the last bin."""
+    lengths = np.minimum(np.asarray(lengths), bin_edges[-1] - 1)
+    counts, _ = np.histogram(lengths, bins=bin_edges)
+    return counts / max(counts.sum(), 1)
@@ -0,0 +1,183 @@
+import argparse
+import functools
+import random
+import numpy as np
+from textblob import TextBlob
+
+
+def speech_sentiment(text):
+    """TextBlob sentiment of a speech from one assessment pass: overall and per-sentence polarity and subjectivity.
+
+    The text is tokenized once like TextBlob's PatternAnalyzer does and assessed as a whole, which
+    gives TextBlob(text).sentiment; every assessment is also credited to the (pattern) sentence it
+    starts in, see SentimentLexicon.score.
+    """
+    from textblob.en import sentiment as pattern_sentiment
+    return sentiment_lexicon().score([sentence.lower().split() for sentence in pattern_sentiment.tokenizer(text)])
+
+
+def sentiment_series(polarity, subjectivity, sentence_polarities, sentence_subjectivities):
+    """Reduce a speech's sentiment to the per-speech series the engine averages by year."""
+    sentence_polarities = np.asarray(sentence_polarities, dtype=float)
+    sentence_subjectivities = np.asarray(sentence_subjectivities, dtype=float)
+    series = {'sentiment_polarity': polarity, 'sentiment_subjectivity': subjectivity}
+    if len(sentence_polarities):
+        series['sentence_polarity_std'] = float(sentence_polarities.std())
+        series['sentence_subjectivity_std'] = float(sentence_subjectivities.std())
+        series['positive_sentence_share'] = float(np.mean(sentence_polarities > 0))
+        series['negative_sentence_share'] = float(np.mean(sentence_polarities < 0))
+    return series
+
+
+class SentimentLexicon:
+    """TextBlob's PatternAnalyzer lexicon compiled into a flat token -> (polarity, subjectivity, intensity) table.
+
+    score() replays PatternAnalyzer's assessment rules (modifiers, negations, '!') over already
+    tokenized, lower-cased words, so cached tokens can be scored without TextBlob re-tokenizing
+    and re-parsing every speech. Tokens come from NLTK rather than pattern's tokenizer, so the
+    values differ slightly from TextBlob's; see parity_report.
+    """
+
+    def __init__(self):
+        from textblob.en import sentiment as pattern_sentiment
+        from textblob._text import EMOTICONS, PUNCTUATION
+
+        pattern_sentiment.load()
+        # Untagged tokens are looked up with pos None, the average over all part-of-speech tags
+        self.table = {word: tuple(tags[None]) for word, tags in dict.items(pattern_sentiment) if None in tags}
+        # Known words that can intensify the next known word ("very good")
+        self.modifiers = {word for word, tags in dict.items(pattern_sentiment)
+                          if word in self.table and any(tag in tags for tag in pattern_sentiment.modifiers)}
+        self.negations = set(pattern_sentiment.negations)
+        self.punctuation = PUNCTUATION
+        self.emoticons = {}
+        for (_, polarity), faces in EMOTICONS.items():
+            for face in faces:
+                self.emoticons.setdefault(face.lower(), polarity)
+
+    def assess(self, words):
+        """Return the (start token index, polarity, subjectivity) of every assessment in a token list."""
+        table = self.table
+        negations = self.negations
+        assessments = []  # [start, polarity, subjectivity, intensity, negated]
+        modifier = None  # Preceding modifier (i.e., adverb or adjective)
+        negation = None  # Preceding negation (e.g., "not beautiful")
+
+        for index, word in enumerate(words):
+            scores = table.get(word)
+            if scores is not None:
+                polarity, subjectivity, intensity = scores
+                if modifier is None:
+                    assessments.append([index, polarity, subjectivity, intensity, False])
+                else:
+                    last = assessments[-1]
+                    last[1] = max(-1.0, min(polarity * last[3], +1.0))
+                    last[2] = max(-1.0, min(subjectivity * last[3], +1.0))
+                    last[3] = intensity
+                if negation is not None:
+                    last = assessments[-1]
+                    last[3] = 1.0 / last[3]
+                    last[4] = True
+                modifier = word if word in self.modifiers else None
+                negation = word if word in negations else None
+            else:
+                if word in negations:
+                    negation = word
+                elif negation and len(word.strip("'")) > 1:
+                    negation = None
+                if negation is not None and modifier is not None and modifier.endswith('ly'):
+                    assessments[-1][4] = True
+                    negation = None
+                elif modifier and len(word) > 2:
+                    modifier = None
+                if word == '!' and assessments:
+                    assessments[-1][1] = max(-1.0, min(assessments[-1][1] * 1.25, +1.0))
+                if word == '(!)':
+                    assessments.append([index, 0.0, 1.0, 1.0, False])
+                if not word.isalpha() and len(word) <= 5 and word not in self.punctuation and word in self.emoticons:
+                    assessments.append([index, self.emoticons[word], 1.0, 1.0, False])
+
+        # "not good" = slightly bad, "not bad" = slightly good
+        return [(start, polarity * -0.5 if negated else polarity, subjectivity)
+                for start, polarity, subjectivity, _, negated in assessments]
+
+    def score(self, sentence_words):
+        """Sentiment of a speech given as lower-cased tokens per sentence, in one scan.
+
+        Returns (polarity, subjectivity, sentence polarities, sentence subjectivities); the
+        speech is assessed as a whole and every assessment is credited to the sentence it starts in.
+        """
+        words = [word for sentence in sentence_words for word in sentence]
+        assessments = self.assess(words)
+        if not assessments:
+            zeros = [0.0] * len(sentence_words)
+            return 0.0, 0.0, zeros, list(zeros)
+
+        starts, polarities, subjectivities = (np.array(column) for column in zip(*assessments))
+        offsets = np.cumsum([0] + [len(sentence) for sentence in sentence_words])
+        sentence_index = np.searchsorted(offsets, starts, side='right') - 1
+        counts = np.bincount(sentence_index, minlength=len(sentence_words))
+        divisor = np.maximum(counts, 1)
+        sentence_polarities = np.bincount(sentence_index, weights=polarities, minlength=len(sentence_words)) / divisor
+        sentence_subjectivities = np.bincount(sentence_index, weights=subjectivities, minlength=len(sentence_words)) / divisor
+        return (float(polarities.mean()), float(subjectivities.mean()),
+                sentence_polarities.tolist(), sentence_subjectivities.tolist())
+
+
+@functools.lru_cache(maxsize=None)
+def sentiment_lexicon():
+    """Return the compiled SentimentLexicon, built on first use."""
+    return SentimentLexicon()
+
+
+def parity_report(folder_path, token_cache=None, speeches_per_year=5, skip_years=(1948, 1949)):
+    """Compare the fast lexicon path against TextBlob on a sample of speeches of every year."""
+    from corpusEngine import SpeechInputs, iter_session_files
+    from corpusReader import open_corpus_text
+
+    speeches_by_year = {}
+    for _, year, txt_file in iter_session_files(folder_path, skip_years):
+        speeches_by_year.setdefault(year, []).append(txt_file)
+
+    differences = {'polarity': [], 'subjectivity': []}
+    for year, txt_files in speeches_by_year.items():
+        for txt_file in random.Random(year).sample(txt_files, min(speeches_per_year, len(txt_files))):
+            with open_corpus_text(txt_file) as file:
+                inputs = SpeechInputs(file.read(), token_cache)
+            if not inputs.get('cleaned').strip():
+                continue
+            reference = TextBlob(inputs.get('cleaned')).sentiment
+            polarity, subjectivity, _, _ = sentiment_lexicon().score(inputs.get('sentence_words'))
+            differences['polarity'].append(abs(polarity - reference.polarity))
+            differences['subjectivity'].append(abs(subjectivity - reference.subjectivity))
+
+    for name, values in differences.items():
+        if values:
+            print(f"{name}: {len(values)} speeches, mean absolute difference {np.mean(values):.5f}, "
+                  f"max {np.max(values):.5f}")
+    if token_cache is not None:
+        token_cache.save()
+    return differences
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='S4/S5 - Sentiment polarity and subjectivity in one pass.')
+    parser.add_argument('--fast', action='store_true', help='score cached tokens with the compiled lexicon instead of TextBlob')
+    parser.add_argument('--parity', action='store_true', help='compare the fast path against TextBlob on a corpus sample')
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes (default: 1, serial)')
+    args = parser.parse_args()
+
+    from corpusEngine import SentimentMetric, run_metrics
+    from graphYearSentimentPolarity import plot_sentiment_polarity_timeline
+    from graphYearSentimentSubjectivity import plot_sentiment_subjectivity_timeline
+    from tokenCache import TokenCache
+
+    # Example usage:
+    folder_path = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\Converted sessions'  # Path to your session folders
+    output_folder = r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\SVGs'  # Folder to save the SVG files
+    token_cache = TokenCache(r'C:\Users\juliu\Desktop\DesinformationTermPaper\static\tokenCache')  # Folder for cached tokenizations
+    if args.parity:
+        parity_report(folder_path, token_cache)
+    results = run_metrics(folder_path, [SentimentMetric(fast=args.fast)], token_cache=token_cache, workers=args.workers)
+    plot_sentiment_polarity_timeline(*results['sentiment_polarity'], output_folder + r'\s4_sentiment_polarity_1946_2022.svg')
+    plot_sentiment_subjectivity_timeline(*results['sentiment_subjectivity'], output_folder + r'\s5_sentiment_subjectivity_1946_2022.svg')
@@ -0,0 +1,76 @@
+from collections import deque
+import numpy as np
+
+
+def moving_ttr_curve(words, window_size):
+    """Return the type-token ratio of every window position as a NumPy array.
+
+    Keeps a frequency table of the current window and updates the number of types as one token
+    enters and one leaves, so the cost is O(n) instead of building a set for every window.
+    """
+    num_windows = len(words) - window_size + 1
+    if window_size <= 0 or num_windows <= 0:
+        return np.empty(0)
+
+    counts = {}
+    for word in words[:window_size]:
+        counts[word] = counts.get(word, 0) + 1
+    num_types = len(counts)
+
+    type_counts = np.empty(num_windows)
+    type_counts[0] = num_types
+    for i in range(window_size, len(words)):
+        leaving = words[i - window_size]
+        entering = words[i]
+        if leaving != entering:
+            count = counts[leaving]
+            if count == 1:
+                del counts[leaving]
+                num_types -= 1
+            else:
+                counts[leaving] = count - 1
+
+            count = counts.get(entering, 0)
+            if count == 0:
+                num_types += 1
+            counts[entering] = count + 1
+        type_counts[i - window_size + 1] = num_types
+
+    return type_counts / window_size
+
+
+class MovingTTRAccumulator:
+    """Streaming counterpart of moving_ttr_curve that only keeps the mean TTR of all windows.
+
+    Tokens are fed in any number of pieces with update(); memory is the current window and its
+    frequency table, whatever the length of the text.
+    """
+
+    def __init__(self, window_size):
+        self.window_size = window_size
+        self.window = deque()
+        self.counts = {}
+        self.type_count_sum = 0
+        self.num_windows = 0
+
+    def update(self, words):
+        window, counts, window_size = self.window, self.counts, self.window_size
+        for word in words:
+            window.append(word)
+            counts[word] = counts.get(word, 0) + 1
+            if len(window) > window_size:
+                leaving = window.popleft()
+                count = counts[leaving]
+                if count == 1:
+                    del counts[leaving]
+                else:
+                    counts[leaving] = count - 1
+            if len(window) == window_size:
+                self.type_count_sum += len(counts)
+                self.num_windows += 1
+
+    def mean(self):
+        """Mean TTR over all windows; a text shorter than the window is one window of its own length."""
+        if self.num_windows:
+            return self.type_count_sum / (self.num_windows * self.window_size)
+        return len(self.counts) / len(self.window) if self.window else 0.0
@@ -0,0 +1,75 @@
+import nltk
+from corpusReader import open_corpus_text
+from resourceManager import require_punkt
+from sentenceSegmentation import sentence_spans
+
+
+def iter_text_chunks(path, chunk_size=1 << 20):
+    """Yield the text of a corpus file in chunks of chunk_size characters."""
+    with open_corpus_text(path) as file:
+        for chunk in iter(lambda: file.read(chunk_size), ''):
+            yield chunk
+
+
+def _last_token_start(text):
+    """Return where the last whitespace-separated token of text starts, len(text) if it has none."""
+    stripped = text.rstrip()
+    if not stripped:
+        return len(text)
+    return len(stripped) - len(stripped.rsplit(None, 1)[-1])
+
+
+def _cleaned_chunks(chunks, clean):
+    # Pieces are cut where their last token starts; a pattern ending in whitespace (like a numbered
+    # label) cannot match across such a cut, so cleaning the pieces equals cleaning the whole text
+    carry = ''
+    for chunk in chunks:
+        text = carry + chunk
+        cut = _last_token_start(text)
+        carry = text[cut:]
+        yield clean(text[:cut])
+    yield clean(carry)
+
+
+def iter_whitespace_tokens(chunks, clean=None):
+    """Yield the tokens of text.split() over the concatenated chunks, never holding more than a chunk.
+
+    clean (a str -> str function such as removing numbered labels) is applied before splitting,
+    with the same result as cleaning the whole text for patterns that end in whitespace.
+    """
+    if clean is not None:
+        chunks = _cleaned_chunks(chunks, clean)
+    carry = ''
+    for chunk in chunks:
+        text = carry + chunk
+        # A token running up to the end of the chunk may continue in the next one
+        cut = len(text) if text[-1:].isspace() else _last_token_start(text)
+        carry = text[cut:]
+        yield from text[:cut].split()
+    yield from carry.split()
+
+
+def iter_word_tokens(chunks, lower=False):
+    """Yield the tokens of nltk.word_tokenize over the concatenated chunks, a sentence at a time.
+
+    Punkt only sees each chunk up to its last whole token, and the last two sentences are held
+    back and split again with the next chunk: whether the last boundary stands depends on the
+    token after it, so only boundaries followed by a whole sentence are final. Memory is bounded
+    by the chunk size instead of the length of the text.
+    lower=True lower-cases the text before tokenizing, like word_tokenize(text.lower()).
+    """
+    require_punkt()
+    carry = ''
+    for chunk in chunks:
+        text = carry + (chunk.lower() if lower else chunk)
+        # The token running up to the chunk edge may continue in the next chunk
+        whole = text[:_last_token_start(text)]
+        sentences = nltk.sent_tokenize(whole)
+        if len(sentences) < 3:
+            carry = text
+            continue
+        carry = text[sentence_spans(whole, sentences)[-2][0]:]
+        for sentence in sentences[:-2]:
+            yield from nltk.word_tokenize(sentence, preserve_line=True)
+    for sentence in nltk.sent_tokenize(carry):
+        yield from nltk.word_tokenize(sentence, preserve_line=True)
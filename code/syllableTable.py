@@ -0,0 +1,67 @@
+import os
+import weakref
+import numpy as np
+
+# Bump when syllable_count changes, so stored tables are rebuilt
+SYLLABLE_VERSION = 'cmudict-max-vowel-groups-1'
+
+
+class SyllableTable:
+    """Syllable count of every vocabulary entry of a tokenCache.TokenCache, indexed by token ID.
+
+    Every token type is looked up in the CMU dictionary once and the table is kept next to the
+    vocabulary, so the syllables of a speech are a single gather over its token IDs.
+    """
+
+    def __init__(self, token_cache):
+        self.token_cache = token_cache
+        self.path = os.path.join(token_cache.cache_dir, 'syllables.npz')
+        self.counts = np.zeros(0, dtype=np.uint16)
+        if os.path.exists(self.path):
+            with np.load(self.path) as table:
+                if str(table['version']) == SYLLABLE_VERSION:
+                    self.counts = table['counts']
+        # Entries past the saved vocabulary refer to tokens this cache does not know
+        self.counts = self.counts[:len(token_cache.vocabulary)]
+        self._saved_size = len(self.counts)
+
+    def extend(self):
+        """Count the syllables of vocabulary entries added since the table was last extended."""
+        # Imported lazily, the Flesch-Kincaid script imports this module
+        from graphYearFleschKincaidsReadabilityEase import syllable_count
+
+        vocabulary = self.token_cache.vocabulary
+        if len(self.counts) < len(vocabulary):
+            new_counts = [syllable_count(token) for token in vocabulary[len(self.counts):]]
+            self.counts = np.concatenate([self.counts, np.array(new_counts, dtype=np.uint16)])
+        return self.counts
+
+    def gather(self, ids):
+        """Return the syllable count of every token ID as an array."""
+        counts = self.counts
+        if len(ids) and int(ids.max()) >= len(counts):
+            counts = self.extend()
+        return counts[ids]
+
+    def save(self):
+        """Write the table, covering the whole saved vocabulary, unless nothing changed."""
+        if self.token_cache.collect_misses:
+            return
+        self.extend()
+        if len(self.counts) == self._saved_size:
+            return
+        temporary_path = self.path + '.tmp.npz'
+        np.savez(temporary_path, counts=self.counts, version=SYLLABLE_VERSION)
+        os.replace(temporary_path, self.path)
+        self._saved_size = len(self.counts)
+
+
+_tables = weakref.WeakKeyDictionary()
+
+
+def syllable_table(token_cache):
+    """Return the SyllableTable of a token cache, loading it on first use."""
+    table = _tables.get(token_cache)
+    if table is None:
+        table = _tables[token_cache] = SyllableTable(token_cache)
+    return table
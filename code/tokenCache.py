@@ -0,0 +1,198 @@
+import os
+import json
+import hashlib
+import zipfile
+import nltk
+import numpy as np
+from sentenceSegmentation import Segmentation, segment_tokens, split_sentences
+from resourceManager import require_punkt
+
+# Bump when the way text is tokenized changes, so cached tokenizations are redone
+TOKENIZER_VERSION = f'treebank-nltk-{nltk.__version__}-1'
+
+
+class TokenCache:
+    """On-disk cache of word tokenizations, stored as integer token IDs plus one shared vocabulary.
+
+    Entries are keyed by a hash of the tokenized text and the tokenizer version, so a file is only
+    tokenized again when its bytes (and therefore its text) or the tokenizer change.
+
+    With collect_misses=True (used inside worker processes) nothing is written; new tokenizations
+    are collected as token strings instead and handed to the parent's cache with merge(). Only the
+    parent assigns token IDs, so the vocabulary on disk only ever grows and a worker's copy of it
+    is always a prefix of it; entries the parent wrote after the worker started are decoded after
+    re-reading the vocabulary.
+    """
+
+    def __init__(self, cache_dir, flush_every=500, collect_misses=False):
+        self.cache_dir = cache_dir
+        self.tokens_dir = os.path.join(cache_dir, 'tokens')
+        self.vocabulary_path = os.path.join(cache_dir, 'vocabulary.json')
+        self.flush_every = flush_every
+        self.collect_misses = collect_misses
+        self.collected = []
+        os.makedirs(self.tokens_dir, exist_ok=True)
+
+        self.vocabulary = []
+        self._load_vocabulary()
+
+        # New entries are only written after the vocabulary they refer to has been saved
+        self._pending = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _load_vocabulary(self):
+        if os.path.exists(self.vocabulary_path):
+            with open(self.vocabulary_path, 'r', encoding='utf-8') as file:
+                self.vocabulary = json.load(file)
+        self.token_ids = {token: token_id for token_id, token in enumerate(self.vocabulary)}
+        self._saved_vocabulary_size = len(self.vocabulary)
+
+    def _key(self, kind, text):
+        digest = hashlib.sha1(f'{TOKENIZER_VERSION}\0{kind}\0'.encode('utf-8'))
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.tokens_dir, key[:2], key + '.npz')
+
+    def _encode(self, tokens):
+        ids = np.empty(len(tokens), dtype=np.uint32)
+        for i, token in enumerate(tokens):
+            token_id = self.token_ids.get(token)
+            if token_id is None:
+                token_id = len(self.vocabulary)
+                self.vocabulary.append(token)
+                self.token_ids[token] = token_id
+            ids[i] = token_id
+        return ids
+
+    def _load(self, key):
+        """Return the cached (ids, offsets, spans) arrays for a key, or None; spans is None for plain tokenizations."""
+        if key in self._pending:
+            return self._pending[key]
+        path = self._entry_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as entry:
+                ids = entry['ids']
+                offsets = entry['offsets']
+                spans = entry['spans'] if 'spans' in entry else None
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            return None  # A corrupt entry (e.g. from an interrupted run) is tokenized again
+        if not len(offsets) or offsets[-1] != len(ids):
+            return None
+        # Written by the parent after this cache read the vocabulary, which it saved first
+        if len(ids) and int(ids.max()) >= len(self.vocabulary):
+            self._load_vocabulary()
+            if int(ids.max()) >= len(self.vocabulary):
+                return None
+        return ids, offsets, spans
+
+    def _add(self, key, sentence_tokens, spans=None):
+        """Encode and store the tokens (and sentence spans) of one entry, returning its (ids, offsets, spans) arrays."""
+        ids = self._encode([token for tokens in sentence_tokens for token in tokens])
+        offsets = np.cumsum([0] + [len(tokens) for tokens in sentence_tokens], dtype=np.int64)
+        self._pending[key] = (ids, offsets, spans)
+        if len(self._pending) >= self.flush_every:
+            self.save()
+        return ids, offsets, spans
+
+    def _lookup(self, kind, text, tokenize):
+        """Return (tokens, ids, offsets, spans) of a text, calling tokenize() for (sentence tokens, spans) on a miss.
+
+        ids is None for the misses of a worker's cache, which are collected for the parent to encode.
+        """
+        key = self._key(kind, text)
+        entry = self._load(key)
+        if entry is not None:
+            self.hits += 1
+            ids, offsets, spans = entry
+            return self.decode(ids), ids, offsets, spans
+
+        self.misses += 1
+        require_punkt()
+        sentence_tokens, spans = tokenize()
+        if self.collect_misses:
+            self.collected.append((key, sentence_tokens, spans))
+            offsets = np.cumsum([0] + [len(tokens) for tokens in sentence_tokens], dtype=np.int64)
+            return [token for tokens in sentence_tokens for token in tokens], None, offsets, spans
+        ids, offsets, spans = self._add(key, sentence_tokens, spans)
+        return self.decode(ids), ids, offsets, spans
+
+    def take_collected(self):
+        """Return and forget the tokenizations collected and the hits counted since the last call."""
+        collected, hits = self.collected, self.hits
+        self.collected = []
+        self.hits = self.misses = 0
+        return collected, hits
+
+    def merge(self, collected, hits=0):
+        """Store tokenizations collected by a worker process's cache and count its hits and misses."""
+        self.hits += hits
+        self.misses += len(collected)
+        for key, sentence_tokens, spans in collected:
+            if self._load(key) is None:
+                self._add(key, sentence_tokens, spans)
+
+    def word_token_ids(self, text):
+        """Return the token IDs of nltk.word_tokenize(text), tokenizing only on a cache miss (None in a worker)."""
+        return self._lookup('words', text, lambda: ([nltk.word_tokenize(text)], None))[1]
+
+    def word_tokenize(self, text):
+        """Cached drop-in replacement for nltk.word_tokenize."""
+        return self._lookup('words', text, lambda: ([nltk.word_tokenize(text)], None))[0]
+
+    def tokenize_sentences(self, sentences):
+        """Return nltk.word_tokenize of every sentence, cached as one entry per list of sentences."""
+        tokens, _, offsets, _ = self._lookup('sentences', '\0'.join(sentences),
+                                             lambda: ([nltk.word_tokenize(sentence) for sentence in sentences], None))
+        return [tokens[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+    def segment(self, text):
+        """Cached sentenceSegmentation.segment_text: tokens, token IDs and sentence boundaries of a text."""
+        tokens, ids, offsets, spans = self._lookup('segments', text, lambda: segment_tokens(text))
+        return Segmentation(tokens, offsets, spans, ids)
+
+    def sentence_spans(self, text):
+        """Cached sentenceSegmentation.split_sentences, stored as an entry without tokens."""
+        def split():
+            spans = split_sentences(text)
+            return [[] for _ in range(len(spans))], spans
+        return self._lookup('sentence_spans', text, split)[3]
+
+    def decode(self, ids):
+        """Map token IDs back to token strings."""
+        vocabulary = self.vocabulary
+        return [vocabulary[token_id] for token_id in ids.tolist()]
+
+    def save(self):
+        """Write new vocabulary entries first, then the pending tokenizations that use them."""
+        if self.collect_misses:
+            return
+        if len(self.vocabulary) != self._saved_vocabulary_size:
+            temporary_path = self.vocabulary_path + '.tmp'
+            with open(temporary_path, 'w', encoding='utf-8') as file:
+                json.dump(self.vocabulary, file, ensure_ascii=False)
+            os.replace(temporary_path, self.vocabulary_path)
+            self._saved_vocabulary_size = len(self.vocabulary)
+
+        for key, (ids, offsets, spans) in self._pending.items():
+            path = self._entry_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written next to the entry and moved into place, so readers never see a partial file
+            temporary_path = f'{path}.{os.getpid()}.tmp'
+            with open(temporary_path, 'wb') as file:
+                if spans is None:
+                    np.savez(file, ids=ids, offsets=offsets)
+                else:
+                    np.savez(file, ids=ids, offsets=offsets, spans=spans)
+            os.replace(temporary_path, path)
+        self._pending = {}
+
+    def report(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0
+        print(f"Token cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1%} hit rate), "
+              f"vocabulary size {len(self.vocabulary)}")
@@ -0,0 +1,158 @@
+import random
+import numpy as np
+
+
+class YearAccumulator:
+    """Running summary of one series in one year, without keeping every per-speech value.
+
+    Holds the count, sum and Welford mean/variance of the values, the pooled numerators and
+    denominators of Ratio values (token weights) and a bounded reservoir sample for medians and
+    bootstrap intervals, exact as long as the year has at most `capacity` speeches.
+    Accumulators of the same series and year can be merged, e.g. partial runs over parts of a corpus.
+    """
+
+    def __init__(self, capacity=4096, seed=0):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.numerator = 0.0
+        self.denominator = 0.0
+        self.capacity = capacity
+        # (value, numerator, denominator) of the sampled speeches
+        self.sample = []
+        self._random = random.Random(seed)
+
+    def add(self, value):
+        """Add one per-speech value; a metricStore.Ratio also adds its numerator and denominator."""
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        # Plain values weigh the same, so their pooled mean is the plain mean
+        numerator = getattr(value, 'numerator', float(value))
+        denominator = getattr(value, 'denominator', 1)
+        self.numerator += numerator
+        self.denominator += denominator
+
+        item = (float(value), numerator, denominator)
+        if len(self.sample) < self.capacity:
+            self.sample.append(item)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < self.capacity:
+                self.sample[slot] = item
+
+    def merge(self, other):
+        """Fold another accumulator of the same series and year into this one."""
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        # Chan et al.'s pairwise update of the Welford sums
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.total += other.total
+        self.numerator += other.numerator
+        self.denominator += other.denominator
+
+        if len(self.sample) + len(other.sample) <= self.capacity:
+            self.sample.extend(other.sample)
+        else:
+            # Keep a uniform sample of the union: draw from each side in proportion to its count
+            rng = np.random.default_rng(self._random.randrange(2 ** 32))
+            from_self = int(rng.hypergeometric(self.count, other.count, self.capacity))
+            self.sample = (self._random.sample(self.sample, from_self)
+                           + self._random.sample(other.sample, self.capacity - from_self))
+        self.count = count
+        return self
+
+    def average(self):
+        """Speech-weighted mean: every speech counts once."""
+        return self.total / self.count
+
+    def weighted_average(self):
+        """Token-weighted mean: pooled numerators over pooled denominators of Ratio values."""
+        return self.numerator / self.denominator if self.denominator else 0.0
+
+    def std(self):
+        """Population standard deviation of the per-speech values."""
+        return float(np.sqrt(self.m2 / self.count))
+
+    def quantile(self, q):
+        """Quantile of the per-speech values, from the reservoir sample."""
+        return float(np.quantile([value for value, _, _ in self.sample], q))
+
+    def bootstrap_interval(self, level=0.95, weighted=False, resamples=1000, seed=0):
+        """Percentile bootstrap interval of the (token-)weighted mean, all resamples drawn at once.
+
+        Once a year outgrows the reservoir, resampling the smaller sample widens the interval,
+        so it errs on the conservative side.
+        """
+        sample = np.array(self.sample, dtype=np.float64)
+        indices = np.random.default_rng(seed).integers(0, len(sample), size=(resamples, len(sample)))
+        if weighted:
+            denominators = sample[:, 2][indices].sum(axis=1)
+            statistics = np.divide(sample[:, 1][indices].sum(axis=1), denominators,
+                                   out=np.zeros(resamples), where=denominators != 0)
+        else:
+            statistics = sample[:, 0][indices].mean(axis=1)
+        tail = (1 - level) / 2
+        low, high = np.quantile(statistics, [tail, 1 - tail])
+        return float(low), float(high)
+
+
+# Per-year statistics curve() can return
+STATISTICS = {
+    'mean': YearAccumulator.average,
+    'weighted_mean': YearAccumulator.weighted_average,
+    'median': lambda accumulator: accumulator.quantile(0.5),
+    'std': YearAccumulator.std,
+    'count': lambda accumulator: accumulator.count,
+}
+
+
+class YearAggregates:
+    """A YearAccumulator for every series and year, filled speech by speech by corpusEngine.run_metrics."""
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        # series name -> {year: YearAccumulator}
+        self.accumulators = {}
+
+    def add(self, year, values):
+        """Add the {series name: value} of one speech."""
+        for name, value in values.items():
+            by_year = self.accumulators.setdefault(name, {})
+            accumulator = by_year.get(year)
+            if accumulator is None:
+                accumulator = by_year[year] = YearAccumulator(self.capacity)
+            accumulator.add(value)
+
+    def merge(self, other):
+        """Fold the accumulators of another YearAggregates into this one."""
+        for name, by_year in other.accumulators.items():
+            for year, accumulator in by_year.items():
+                own = self.accumulators.setdefault(name, {}).get(year)
+                if own is None:
+                    own = self.accumulators[name][year] = YearAccumulator(self.capacity)
+                own.merge(accumulator)
+        return self
+
+    def series(self):
+        return list(self.accumulators)
+
+    def curve(self, series, statistic='mean'):
+        """Return (years, yearly values) of one of the STATISTICS of a series."""
+        by_year = self.accumulators[series]
+        years = sorted(by_year)
+        return years, [STATISTICS[statistic](by_year[year]) for year in years]
+
+    def confidence_band(self, series, level=0.95, weighted=False, resamples=1000):
+        """Return (years, lower bounds, upper bounds) of the bootstrap interval of the yearly means."""
+        by_year = self.accumulators[series]
+        years = sorted(by_year)
+        intervals = [by_year[year].bootstrap_interval(level, weighted, resamples, seed=year) for year in years]
+        return years, [low for low, _ in intervals], [high for _, high in intervals]